@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 
+# Startup time is measured from when this is first imported, so it goes ahead of everything else
+# pylint: disable=wrong-import-order
+from propsd.util import startup  # noqa pylint: disable=unused-import
 import logging
+import threading
 from os import environ
 from pathlib import Path
 
@@ -12,10 +16,10 @@ from propsd import constants
 from propsd.api import v1
 from propsd.config import load_user_settings, load_default_settings, settings, to_seconds, unbox_settings_object
 from propsd.sourcemanager import SourceManager
-from propsd.sources import *
 from propsd.enums import SourceEvents, EnumEncoder, SourceState
 from propsd.sources.factory import SourceFactory
 from propsd.sources.schedulable import get_event
+# pylint: enable=wrong-import-order
 
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] (%(levelname)s) %(name)s: %(message)s')
 logger = logging.getLogger(__name__)
@@ -27,8 +31,10 @@ FlaskDynaconf(app)
 app.json_encoder = EnumEncoder
 app.register_blueprint(v1, url_prefix='/v1')
 
-_required_initial_sources = [MetadataSource, TagsSource, KubernetesSource]
+_required_initial_sources = ['ec2-metadata', 'ec2-tags', 'kubernetes']
 _loaded_initial_sources = []
+# UPDATE events are sent from the sources' worker threads, so the initial sources can finish concurrently
+_index_lock = threading.Lock()
 
 
 @click.command()
@@ -54,32 +60,32 @@ def propsd(configuration, colorize):
     # before we load the index. Because these are special cases we can delay the index until they've
     # both fired their UPDATE event.
     def register_index(**kwargs):
-        sender = kwargs.get('sender')
         source = kwargs.get('source')
-        if sender in _required_initial_sources:
-            _required_initial_sources.remove(sender)
+        with _index_lock:
+            # Only the update that loads the last initial source schedules the index. Later updates find the
+            # list already empty, or the handler already disconnected.
+            if source.type not in _required_initial_sources:
+                return
+            _required_initial_sources.remove(source.type)
             _loaded_initial_sources.append(source)
+            if _required_initial_sources:
+                return
+            signal.disconnect(register_index, dispatch_uid='register_index')
 
-        if not _required_initial_sources:
-            signal.disconnect(register_index, sender=MetadataSource)
-            signal.disconnect(register_index, sender=TagsSource)
-            signal.disconnect(register_index, sender=KubernetesSource)
-            index_settings = unbox_settings_object('index')
+        index_settings = unbox_settings_object('index')
 
-            # Unschedule any initial sources that have been shutdown
-            for s in _loaded_initial_sources:
-                status = s.status()
-                if status.get('state') == SourceState.SHUTDOWN:
-                    SourceManager.unschedule(s)
+        # Unschedule any initial sources that have been shutdown
+        for s in _loaded_initial_sources:
+            status = s.status()
+            if status.get('state') == SourceState.SHUTDOWN:
+                SourceManager.unschedule(s)
 
-            SourceManager.schedule(SourceFactory.new('s3-index')(opts=index_settings),
-                                   index=True,
-                                   delay=to_seconds(settings.get('index.interval')))
+        SourceManager.schedule(SourceFactory.new('s3-index')(opts=index_settings),
+                               index=True,
+                               delay=to_seconds(settings.get('index.interval')))
 
     signal = get_event(SourceEvents.UPDATE)
-    signal.connect(register_index, sender=MetadataSource, weak=False)
-    signal.connect(register_index, sender=TagsSource, weak=False)
-    signal.connect(register_index, sender=KubernetesSource, weak=False)
+    signal.connect(register_index, weak=False, dispatch_uid='register_index')
 
     SourceManager.schedule(SourceFactory.new('ec2-metadata')(),
                            namespace='instance',
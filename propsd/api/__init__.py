@@ -1,4 +1,5 @@
 from datetime import datetime
+from functools import lru_cache
 from http import HTTPStatus
 from os import path
 
@@ -7,24 +8,27 @@ from quart import Blueprint, Response, jsonify, abort, request
 
 from propsd import constants
 from propsd.api.conqueso import conqueso, nested_conqueso
-from propsd.api.properties import properties, nested_properties
-from propsd.enums import SourceState
+from propsd.api.properties import properties, nested_properties, batch
+from propsd.api.stream import stream
+from propsd.config import settings, to_seconds
 from propsd.sourcemanager import SourceManager
+from propsd.util import startup
 
 _api_version = 'v1'
 v1 = Blueprint(_api_version, __name__)
 v1.route('/properties', strict_slashes=False, methods=['GET', 'OPTIONS'])(properties)
+# Outside `/properties` so it can't shadow a top level property called `stream`
+v1.route('/stream')(stream)
+v1.route('/properties/batch', methods=['POST'])(batch)
 v1.route('/properties/<path:subpath>')(nested_properties)
 v1.route('/conqueso')(conqueso)
 v1.route('/conqueso/api/roles/<path:role>/properties/<path:nested_property>')(nested_conqueso)
 
 _started = datetime.now()
-_healthy_states = [
-    SourceState.RUNNING,
-    SourceState.WAITING
-]
+_unguarded_paths = frozenset('/{}'.format(path.join(_api_version, i)) for i in ['health', 'status'])
 
 
+@lru_cache(maxsize=None)
 def _get_version():
     return pkg_resources.require(constants.APP_NAME)[0].version
 
@@ -37,16 +41,21 @@ async def check_health():
     """
 
     # We don't want to return the 404 for health and status routes
-    if request.path in ['/{}'.format(path.join(_api_version, i)) for i in ['health', 'status']]:
+    if request.path in _unguarded_paths:
         return
 
-    healthy = False
-    for index in SourceManager.health().get('indices', []):
-        healthy = index.get('ok') and index.get('state') in _healthy_states
-    if not healthy:
+    if not SourceManager.ready():
         abort(404)
 
 
+@v1.after_request
+async def record_startup(response):
+    if startup.time_to_ready() is None and response.status_code == HTTPStatus.OK and \
+            request.path not in _unguarded_paths:
+        startup.mark_ready(to_seconds(settings.get('service.startup_budget')))
+    return response
+
+
 @v1.errorhandler(HTTPStatus.NOT_FOUND)
 async def not_found(err):  # pylint: disable=unused-argument
     return Response('{}', HTTPStatus.NOT_FOUND)
@@ -85,6 +94,7 @@ async def status():
         'status': code,
         'uptime': (datetime.now() - _started).seconds,
         'version': _get_version(),
+        'startup': startup.time_to_ready(),
         'index': indices[0] if indices else None,
         'indices': indices,
         'sources': sources
@@ -1,21 +1,32 @@
 import logging
+from typing import Dict
 
 from flatdict import FlatDict
+from quart import Response, abort
 
+from propsd.api.response import body_response
 from propsd.sourcemanager import SourceManager
+from propsd.sourcemanager.snapshot import Body, Snapshot
 
 logger = logging.getLogger(__name__)
 
 
-def _make_java_properties(data: dict) -> str:
-    props = []
-    for key in data:
-        if isinstance(data[key], bool):
-            val = str(data[key]).lower()
-        else:
-            val = data[key]
-        props.append("{}={}".format(key, val))
-    return '\n'.join(props)
+class _Conqueso:
+    """
+    The flattened Conqueso view of a snapshot along with its rendered `.properties` body.
+    """
+    __slots__ = 'properties', 'body'
+
+    def __init__(self, properties: Dict[str, str]) -> None:
+        self.properties = properties
+        self.body = Body('\n'.join('{}={}'.format(k, v) for k, v in properties.items()).encode('utf-8'),
+                         mimetype='text/plain')
+
+
+def _to_java_value(value) -> str:
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
 
 
 def _translate_conqueso_addresses(properties: dict) -> dict:
@@ -26,8 +37,9 @@ def _translate_conqueso_addresses(properties: dict) -> dict:
     return properties
 
 
-async def conqueso():
-    props = SourceManager.properties()
+def _render(snapshot: Snapshot) -> _Conqueso:
+    # The properties snapshot is shared between requests so we only work on a shallow copy of it
+    props = dict(snapshot.properties)
 
     # Remove instance data and tags
     props.pop('instance', None)
@@ -35,9 +47,19 @@ async def conqueso():
 
     translated = _translate_conqueso_addresses(props)
     flat = dict(FlatDict(translated, delimiter='.'))
-    results = _make_java_properties(flat)
-    return results
+    return _Conqueso({key: _to_java_value(value) for key, value in flat.items()})
+
+
+def _conqueso() -> _Conqueso:
+    return SourceManager.snapshot().derive('conqueso', _render)
+
+
+async def conqueso():
+    return body_response(_conqueso().body)
 
 
-async def nested_conqueso(role, nested_property):
-    props = SourceManager.properties()
+async def nested_conqueso(role, nested_property):  # pylint: disable=unused-argument
+    value = _conqueso().properties.get(nested_property)
+    if value is None:
+        abort(404)
+    return Response(value, mimetype='text/plain')
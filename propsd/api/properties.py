@@ -1,28 +1,155 @@
+import functools
+import json
 import logging
-from typing import TYPE_CHECKING, List
+import re
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any, Iterable, List, Tuple
 
-from quart import jsonify, abort
+from quart import abort, request
 
+from propsd import constants
+from propsd.api.response import body_response, negotiate_format
+from propsd.enums import EnumEncoder
 from propsd.sourcemanager import SourceManager
+from propsd.sourcemanager.snapshot import Body
+from propsd.util.patch import diff
+from propsd.util.serialization import available_formats
 
 logger = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
     from quart import Response  # pylint: disable=ungrouped-imports
+    from propsd.sourcemanager.snapshot import Snapshot  # pylint: disable=ungrouped-imports
+
+# Blocking query limits in seconds, matching Consul's
+_default_wait = 300
+_max_wait = 600
+
+# Go style durations, as Consul takes them, like `500ms` or `1m30s`
+_duration_units = {'ns': 1e-9, 'us': 1e-6, 'µs': 1e-6, 'ms': 1e-3, 's': 1, 'm': 60, 'h': 3600}
+_duration_part = r'(\d+(?:\.\d*)?|\.\d+)(ns|us|µs|ms|s|m|h)'
+_duration = re.compile(r'(?:{})+'.format(_duration_part))
+
+
+def _parse_duration(value: str) -> float:
+    """
+    Seconds in a Go style duration. Raises `ValueError` if `value` isn't one.
+    """
+    if value == '0':
+        return 0.0
+    if not _duration.fullmatch(value):
+        raise ValueError('Invalid duration: {}'.format(value))
+    return sum(float(amount) * _duration_units[unit] for amount, unit in re.findall(_duration_part, value))
+
+
+async def _get_snapshot() -> 'Snapshot':
+    """
+    Return the current snapshot, or with `?index=N` hold the request until a snapshot newer than version `N`
+    is published or `?wait` expires.
+    """
+    index = request.args.get('index')
+    if index is None:
+        return SourceManager.snapshot()
+    try:
+        version = int(index)
+        wait = request.args.get('wait')
+        wait = _default_wait if wait is None else _parse_duration(wait)
+    except ValueError:
+        abort(HTTPStatus.BAD_REQUEST)
+    return await SourceManager.watch(version, max(0.0, min(wait, _max_wait)))
+
+
+def _split_path(path: str) -> Tuple[str, ...]:
+    return tuple(filter(None, path.split('/')))
+
+
+def _project(snapshot: 'Snapshot', paths: Iterable[Tuple[str, ...]]) -> dict:
+    """
+    Build a document holding only the subtrees at `paths`, skipping any that don't exist.
+    """
+    projection: dict = {}
+    included: List[Tuple[str, ...]] = []
+    # Shorter paths first so we can skip anything already included through a parent
+    for path in sorted(set(paths), key=len):
+        if not path or any(path[:len(p)] == p for p in included):
+            continue
+        try:
+            node: Any = snapshot.get(path)
+        except KeyError:
+            continue
+        included.append(path)
+        parent = projection
+        for key in path[:-1]:
+            parent = parent.setdefault(key, {})
+        parent[path[-1]] = node
+    return projection
+
+
+def _headers(snapshot: 'Snapshot') -> dict:
+    headers = {constants.INDEX_HEADER: str(snapshot.version)}
+    if len(available_formats()) > 1:
+        headers['Vary'] = 'Accept'
+    return headers
+
+
+def _patch(previous: dict, snapshot: 'Snapshot') -> Body:
+    return Body(json.dumps(diff(previous, snapshot.properties), cls=EnumEncoder).encode('utf-8'),
+                mimetype='application/json-patch+json')
 
 
 async def properties() -> 'Response':
-    return jsonify(SourceManager.properties())
+    snapshot = await _get_snapshot()
+    fields = request.args.get('fields')
+    if fields is not None:
+        # Field masks pick a handful of comma separated subpaths out of the document
+        projection = _project(snapshot, (_split_path(f) for f in fields.split(',')))
+        # Projections are built for one response so only the coding it's sent in is compressed
+        body = Body.serialize(projection, negotiate_format(available_formats()), eager=False)
+        return body_response(body, _headers(snapshot))
+    since = request.args.get('since')
+    if since is not None:
+        try:
+            version = int(since)
+        except ValueError:
+            abort(HTTPStatus.BAD_REQUEST)
+        previous = SourceManager.history(version)
+        # Fall back to the whole document once the version has aged out of the history
+        if previous is not None:
+            # Patches are shared by every client asking for changes since the same version
+            patch = snapshot.derive('since:{}'.format(version), functools.partial(_patch, previous))
+            return body_response(patch, _headers(snapshot))
+    return body_response(snapshot.body_at((), negotiate_format(available_formats())), _headers(snapshot))
 
 
 async def nested_properties(subpath) -> 'Response':
     logger.debug('API/Properties: Received sub-path %s', subpath)
-    props = SourceManager.properties()
-    paths: List[str] = list(filter(None, subpath.split('/')))
-    paths.reverse()
-    while paths:
-        path = paths.pop()
-        if path not in props:
-            abort(404)
-        props = props.get(path)  # type: ignore
-    return jsonify(props)
+    path = _split_path(subpath)
+    snapshot = await _get_snapshot()
+    try:
+        body = snapshot.body_at(path, negotiate_format(available_formats()))
+    except KeyError:
+        abort(404)
+    return body_response(body, _headers(snapshot))
+
+
+async def batch() -> 'Response':
+    """
+    Look up a list of subpaths in one request. Expects a body like `{"paths": ["consul/redis", "instance/region"]}`
+    and responds with the value of every path that exists, keyed by path, and a list of those that don't.
+    """
+    data = await request.get_json(force=True, silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('paths'), list) or \
+            not all(isinstance(p, str) for p in data['paths']):
+        abort(HTTPStatus.BAD_REQUEST)
+    paths: List[str] = data['paths']
+
+    snapshot = SourceManager.snapshot()
+    found = {}
+    missing = []
+    for path in paths:
+        try:
+            found[path] = snapshot.get(_split_path(path))
+        except KeyError:
+            missing.append(path)
+    body = Body.serialize({'properties': found, 'missing': missing}, negotiate_format(available_formats()), eager=False)
+    return body_response(body, _headers(snapshot))
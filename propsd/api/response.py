@@ -0,0 +1,111 @@
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Union
+
+from quart import Response, request
+
+from propsd.util.compression import available_encodings
+from propsd.util.serialization import aliases
+
+if TYPE_CHECKING:
+    from propsd.sourcemanager.snapshot import Body
+
+
+def _quote_etag(etag: str) -> str:
+    return '"{}"'.format(etag)
+
+
+def etag_matches(etag: str) -> bool:
+    """
+    Weakly compare `etag` against the request's `If-None-Match` header as described in RFC 7232 section 3.2.
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == _quote_etag(etag):
+            return True
+    return False
+
+
+def make_response(data: Union[bytes, str], etag: str, mimetype: str, headers: Optional[dict] = None) -> Response:
+    headers = {**headers, 'ETag': _quote_etag(etag)} if headers else {'ETag': _quote_etag(etag)}
+    if etag_matches(etag):
+        return Response(b'', HTTPStatus.NOT_MODIFIED, headers)
+    return Response(data, HTTPStatus.OK, headers, mimetype=mimetype)
+
+
+def _parse_weights(header: str) -> Dict[str, float]:
+    """
+    Parse the values of an `Accept` style header into a mapping of value to its `q` weight.
+    """
+    weights = {}
+    for item in header.split(','):
+        value, _, params = item.partition(';')
+        weight = 1.0
+        for param in params.split(';'):
+            name, _, param_value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(param_value)
+                except ValueError:
+                    weight = 0.0
+        weights[value.strip().lower()] = weight
+    return weights
+
+
+def negotiate_encoding(encodings: Iterable[str]) -> Optional[str]:
+    """
+    Pick the first of `encodings` the client accepts, by weight, from its `Accept-Encoding` header.
+    """
+    header = request.headers.get('Accept-Encoding')
+    if not header:
+        return None
+    weights = _parse_weights(header)
+
+    selected, selected_weight = None, 0.0
+    for coding in encodings:
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > selected_weight:
+            selected, selected_weight = coding, weight
+    return selected
+
+
+def negotiate_format(formats: List[str]) -> str:
+    """
+    Pick the first of `formats` the client accepts, by weight, from its `Accept` header, falling back to the
+    first format if it accepts none of them.
+    """
+    header = request.headers.get('Accept')
+    if not header:
+        return formats[0]
+    weights: Dict[str, float] = {}
+    for mimetype, weight in _parse_weights(header).items():
+        mimetype = aliases.get(mimetype, mimetype)
+        weights[mimetype] = max(weight, weights.get(mimetype, 0.0))
+
+    selected, selected_weight = formats[0], 0.0
+    for mimetype in formats:
+        major = mimetype.split('/')[0]
+        weight = weights.get(mimetype, weights.get('{}/*'.format(major), weights.get('*/*', 0.0)))
+        if weight > selected_weight:
+            selected, selected_weight = mimetype, weight
+    return selected
+
+
+def body_response(body: 'Body', headers: Optional[dict] = None) -> Response:
+    headers = dict(headers) if headers else {}
+    codings = body.codings
+    encoded = None
+    if codings:
+        headers['Vary'] = ', '.join(filter(None, [headers.get('Vary'), 'Accept-Encoding']))
+        coding = negotiate_encoding(c for c in available_encodings() if c in codings)
+        encoded = body.encoded(coding) if coding is not None else None
+        if encoded is not None:
+            headers['Content-Encoding'] = coding
+    data, etag = encoded if encoded is not None else (body.data, body.etag)
+    return make_response(data, etag, body.mimetype, headers)
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING, Optional, Set, Tuple
+
+from quart import make_response
+
+from propsd.enums import EnumEncoder
+from propsd.sourcemanager import SourceManager
+from propsd.util.patch import diff
+
+if TYPE_CHECKING:
+    from quart import Response  # pylint: disable=ungrouped-imports
+    from propsd.sourcemanager.snapshot import Snapshot  # pylint: disable=ungrouped-imports
+
+logger = logging.getLogger(__name__)
+
+# Number of undelivered events a subscriber may fall behind by before it's resynchronized
+_buffer_size = 16
+# Seconds between keep-alive comments on an idle stream
+_keep_alive = 30
+# Seconds the broker waits for a new snapshot before checking whether anyone is still subscribed
+_broker_wait = 60
+
+_resync = object()
+
+Event = Tuple[int, bytes]
+
+
+def _encode_event(name: str, version: int, data: bytes) -> bytes:
+    return b'event: %s\nid: %d\ndata: %s\n\n' % (name.encode('utf-8'), version, data)
+
+
+def _snapshot_event(snapshot: 'Snapshot') -> Event:
+    return snapshot.version, _encode_event('snapshot', snapshot.version, snapshot.body.data)
+
+
+class _Subscriber:
+    __slots__ = 'queue',
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=_buffer_size)
+
+    def offer(self, event) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop everything this subscriber hasn't read yet and send it the whole document instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_resync)
+
+
+class _Broker:
+    """
+    Compute the patch between consecutive snapshots once and fan it out to every subscriber.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: Set[_Subscriber] = set()
+        self._snapshot: Optional['Snapshot'] = None
+        self._task: Optional[asyncio.Future] = None
+
+    @property
+    def snapshot(self) -> 'Snapshot':
+        return self._snapshot if self._snapshot is not None else SourceManager.snapshot()
+
+    def subscribe(self) -> _Subscriber:
+        if self._task is None:
+            self._snapshot = SourceManager.snapshot()
+            self._task = asyncio.ensure_future(self._run())
+        subscriber = _Subscriber()
+        # Subscribers start from the snapshot the next patch will be computed against
+        subscriber.offer(_snapshot_event(self.snapshot))
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    async def _run(self) -> None:
+        try:
+            while self._subscribers:
+                current = self.snapshot
+                snapshot = await SourceManager.watch(current.version, _broker_wait)
+                if snapshot.version == current.version:
+                    continue
+                operations = diff(current.properties, snapshot.properties)
+                self._snapshot = snapshot
+                data = json.dumps(operations, cls=EnumEncoder).encode('utf-8')
+                event = (snapshot.version, _encode_event('patch', snapshot.version, data))
+                for subscriber in list(self._subscribers):
+                    subscriber.offer(event)
+        finally:
+            self._task = None
+            self._snapshot = None
+
+
+_broker = _Broker()
+
+
+async def _events(subscriber: _Subscriber):
+    version = -1
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), _keep_alive)
+            except asyncio.TimeoutError:
+                yield b': keep-alive\n\n'
+                continue
+            if event is _resync:
+                event = _snapshot_event(_broker.snapshot)
+            event_version, data = event
+            # Patches queued before a resync are already part of the document it sent
+            if event_version <= version:
+                continue
+            version = event_version
+            yield data
+    finally:
+        _broker.unsubscribe(subscriber)
+
+
+async def stream() -> 'Response':
+    """
+    Stream the properties as server-sent events: a `snapshot` event with the whole document followed by a
+    `patch` event holding JSON patch operations for every newer snapshot. Event ids are snapshot versions.
+    """
+    response = await make_response(_events(_broker.subscribe()), {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache'
+    })
+    response.timeout = None
+    return response
@@ -8,7 +8,11 @@ INDEX = {
 
 SERVICE = {
     'port': 9100,
-    'hostname': '127.0.0.1'
+    'hostname': '127.0.0.1',
+    # Time allowed between starting and serving the first properties response before a warning is logged
+    'startup_budget': '10s',
+    # Number of sources that may be fetching at once
+    'poll_workers': 8
 }
 
 LOG = {
@@ -19,16 +23,27 @@ LOG = {
 CONSUL = {
     'host': '127.0.0.1',
     'port': 8500,
-    'scheme': 'https'
+    'scheme': 'https',
+    # How long a blocking query waits for changes. Keep it below the source's polling interval.
+    'wait': '25s',
+    # Maximum number of services whose health is read at once
+    'concurrency': 8
 }
 
 METADATA = {
     'host': '169.254.169.254',
-    'interval': '30s'
+    'interval': '30s',
+    # How often metadata that rarely changes, like public addresses and interfaces, is fetched again
+    'slow_interval': '5m',
+    'timeout': 5,
+    # Maximum number of metadata paths fetched at once
+    'concurrency': 8
 }
 
 TAGS = {
-    'interval': '30s'
+    'interval': '30s',
+    # Read tags from the instance metadata service when the instance exposes them instead of calling DescribeTags
+    'metadata': True
 }
 
 KUBERNETES = {
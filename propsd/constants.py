@@ -1,3 +1,6 @@
 # pylint: disable=invalid-name
 
 APP_NAME = 'propsd'
+
+# Response header carrying the version of the properties snapshot a response was built from
+INDEX_HEADER = 'X-Propsd-Index'
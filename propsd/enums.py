@@ -36,8 +36,17 @@ class SourceEvents(Enum):
     SHUTDOWN = 'SHUTDOWN'
 
 
+def enum_name(obj):
+    """
+    Serialize enums by name. Used as the fallback for every format properties are encoded in.
+    """
+    if isinstance(obj, Enum):
+        return obj.name
+    raise TypeError('Object of type {} is not serializable'.format(obj.__class__.__name__))
+
+
 class EnumEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Enum):
-            return obj.name
+            return enum_name(obj)
         return super().default(obj)
@@ -1,11 +1,12 @@
+import asyncio
 import hashlib
 import json
 import logging
-import re
-from collections import OrderedDict
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime
 from http import HTTPStatus
-from typing import TYPE_CHECKING, Optional, List, Tuple
+from typing import TYPE_CHECKING, Optional, List, Tuple, Set, Dict
 
 from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
 from apscheduler.events import JobExecutionEvent
@@ -13,16 +14,14 @@ from apscheduler.job import Job
 from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from jinja2 import Environment
-from jinja2.exceptions import UndefinedError
 from pytz import utc
 
-from propsd.util import convert_to_object_access
-from propsd.util.template import PreserveUndefined
 from propsd.util.immutabledict import ImmutableDict
-from propsd.util.remerge import remerge
+from propsd.util.interpolation import Interpolator
+from propsd.util.layers import LayeredMerge, Path
 from propsd.util.singleton import Singleton
-from propsd.enums import SourceStatus
+from propsd.enums import SourceStatus, SourceEvents, SourceState
+from propsd.sourcemanager.snapshot import Snapshot
 
 if TYPE_CHECKING:
     from propsd.sources.source import Source
@@ -31,6 +30,18 @@ logger = logging.getLogger(__name__)
 
 _default_delay = 30
 
+# Number of previous property trees kept around for computing changes since an earlier version
+_history_size = 32
+
+# Index states in which we consider propsd ready to serve properties
+_healthy_states = [
+    SourceState.RUNNING,
+    SourceState.WAITING
+]
+
+# Name of the merge layer holding properties from the config file. It's pinned above every source layer.
+_static_layer = '__propsd__'
+
 _jobstores = {
     'default': MemoryJobStore()
 }
@@ -79,18 +90,46 @@ class SourceManager(metaclass=Singleton):
         indices: OrderedDict = OrderedDict()
         scheduler: AsyncIOScheduler = AsyncIOScheduler()
         properties: ImmutableDict = ImmutableDict()
+        layers: LayeredMerge = LayeredMerge()
+        interpolator: Interpolator = Interpolator()
+        snapshot: Snapshot = Snapshot()
+        pending: Set[str] = set()
+        # Property trees of recent snapshots by version. They share all unchanged subtrees with each other.
+        history: deque = deque(maxlen=_history_size)
+        # Resolved with the next published snapshot. Shared by every request waiting on a change.
+        published: Optional[asyncio.Future] = None
+        # Source statuses are cached and only refreshed for sources that signalled a change since they were read
+        unchecked: Set[str] = set()
+        index_statuses: Dict[str, dict] = OrderedDict()
+        source_statuses: Dict[str, dict] = OrderedDict()
+        failing: Dict[Tuple[str, str], dict] = OrderedDict()
+        ready: bool = False
+        health: Optional[dict] = None
+        # Sources are scheduled, unscheduled and polled from worker threads
+        lock = threading.RLock()
         update_hold_down = 1000
 
-    _env = Environment(undefined=PreserveUndefined)
-
     def __init__(self, initial_properties: Optional[dict] = None):
         self._Internal.scheduler.configure(jobstores=_jobstores,
                                            executors=_executors,
                                            job_defaults=_job_defaults,
                                            timezone=utc)
         self._Internal.scheduler.add_listener(_scheduler_event_logger, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+        self._Internal.scheduler.add_listener(self._poll_again, EVENT_JOB_EXECUTED)
         if initial_properties:
             self._Internal.properties = ImmutableDict(initial_properties)
+        self._Internal.layers.set_layer(_static_layer, self._Internal.properties.to_dict(), pinned=True)
+
+        # Sources import the SourceManager so we can only bind to their events once everything is loaded
+        from propsd.sources.schedulable import get_event  # pylint: disable=import-outside-toplevel
+        for event in [SourceEvents.UPDATE, SourceEvents.SHUTDOWN]:
+            get_event(event).connect(self._invalidate, weak=False, dispatch_uid='sourcemanager')
+        for event in [SourceEvents.INITIALIZED, SourceEvents.UPDATE, SourceEvents.NO_UPDATE,
+                      SourceEvents.ERROR, SourceEvents.SHUTDOWN]:
+            get_event(event).connect(self._invalidate_health, weak=False, dispatch_uid='sourcemanager-health')
+        self._Internal.snapshot = Snapshot(self._Internal.interpolator.update(self._Internal.layers.merged),
+                                           self._Internal.snapshot)
+        self._Internal.history.append((self._Internal.snapshot.version, self._Internal.snapshot.properties))
 
     ###
     # Meta scheduling methods
@@ -120,14 +159,22 @@ class SourceManager(metaclass=Singleton):
             'source': source,
             'namespace': namespace
         }
-        if index:
-            cls._Internal.indices[source.name] = source_data
-        else:
-            cls._Internal.sources[source.name] = source_data
+        with cls._Internal.lock:
+            cls._Internal.unchecked.add(source.name)
+            if index:
+                cls._Internal.indices[source.name] = source_data
+            else:
+                cls._Internal.sources[source.name] = source_data
+                # Reserve the source's merge layer so layers stay in the order sources were scheduled
+                if source.name not in cls._Internal.layers:
+                    cls._Internal.layers.set_layer(source.name, None)
 
     @classmethod
     def unregister(cls, name: str) -> None:
-        del cls._Internal.sources[name]
+        with cls._Internal.lock:
+            del cls._Internal.sources[name]
+            cls._Internal.pending.add(name)
+            cls._Internal.unchecked.add(name)
 
     ###
     # Source scheduling
@@ -148,7 +195,7 @@ class SourceManager(metaclass=Singleton):
         if existing_job:
             existing_job.remove()
 
-        job = cls._Internal.scheduler.add_job(src.get, args=(),
+        job = cls._Internal.scheduler.add_job(cls._poll, args=(src,),
                                               trigger=trigger,
                                               id=job_id,
                                               name=source_name,
@@ -161,32 +208,113 @@ class SourceManager(metaclass=Singleton):
         cls.unregister(src.name)
         cls._Internal.scheduler.remove_job(_generate_job_id(str(src)))
 
+    @classmethod
+    async def _poll(cls, src: 'Source') -> None:
+        available = src.available
+        await src.get()
+        # A source's first successful pass makes its properties visible without necessarily sending an UPDATE
+        if src.available != available:
+            cls._Internal.pending.add(src.name)
+        # Sources go back to waiting after a poll without signalling it
+        cls._Internal.unchecked.add(src.name)
+        cls.publish()
+
+    @classmethod
+    def _poll_again(cls, event: JobExecutionEvent) -> None:
+        """
+        Poll blocking sources again as soon as they return. Their polls wait on the source until it changes, so
+        their interval only paces them while they're failing.
+        """
+        job = cls._Internal.scheduler.get_job(event.job_id)
+        if job is None:
+            return
+        src = job.args[0]
+        if src.blocking and src.ok and src.available:
+            job.modify(next_run_time=datetime.now())
+
     ###
     # Properties
     ###
     @classmethod
-    def properties(cls) -> dict:
-        all_properties: OrderedDict = OrderedDict()
-        for name, source_data in cls._Internal.sources.items():
-            source_properties: dict = {}
-            source = source_data.get('source')
-            # We don't want to include data from sources that aren't `ok`
-            if not source.available:
-                continue
-            props = source.properties.to_dict() if isinstance(source.properties, ImmutableDict) else source.properties
-            _put_in_dict(source_properties, source_data.get('namespace'), ':', props)
-            all_properties[name] = source_properties
-        merged = remerge(all_properties.values())
-        final = remerge([merged, cls._Internal.properties])
-        # Interpolate keys that have been set based on other values
-        template = cls._env.from_string(
-            re.sub(r'{{ ?(.+?) ?}}', convert_to_object_access, json.dumps(final))
-        )
+    def _invalidate(cls, **kwargs) -> None:
+        source = kwargs.get('source')
+        if source is not None:
+            cls._Internal.pending.add(source.name)
+
+    @classmethod
+    def publish(cls) -> Snapshot:
+        """
+        Apply pending source changes to the merged properties and publish a new snapshot if anything changed.
+        """
+        changed: List[Path] = []
+        with cls._Internal.lock:
+            while cls._Internal.pending:
+                name = cls._Internal.pending.pop()
+                source_data = cls._Internal.sources.get(name)
+                if source_data is None:
+                    changed += cls._Internal.layers.remove_layer(name)
+                else:
+                    changed += cls._Internal.layers.set_layer(name, cls._source_layer(source_data))
+        if changed:
+            # Only values under, or referencing, the changed paths are interpolated again
+            resolved = cls._Internal.interpolator.update(cls._Internal.layers.merged, changed)
+            cls._Internal.snapshot = Snapshot(resolved, cls._Internal.snapshot)
+            cls._Internal.history.append((cls._Internal.snapshot.version, resolved))
+            published, cls._Internal.published = cls._Internal.published, None
+            if published is not None and not published.done():
+                published.set_result(cls._Internal.snapshot)
+            logger.debug('SourceManager: Published new properties snapshot after %d changes', len(changed))
+        return cls._Internal.snapshot
+
+    @classmethod
+    def snapshot(cls) -> Snapshot:
+        return cls._Internal.snapshot
+
+    @classmethod
+    async def watch(cls, version: int, timeout: float) -> Snapshot:
+        """
+        Wait up to `timeout` seconds for a snapshot newer than `version` to be published and return the current
+        snapshot. A `version` ahead of the current one can only come from before a restart so it returns at once.
+        """
+        snapshot = cls._Internal.snapshot
+        if snapshot.version != version:
+            return snapshot
+        if cls._Internal.published is None:
+            cls._Internal.published = asyncio.get_event_loop().create_future()
         try:
-            return json.loads(template.render(final))
-        except (UndefinedError, json.JSONDecodeError) as ex:
-            # logger.error(ex)
-            return final
+            # Shield the shared future so a waiter timing out doesn't cancel it for everyone else
+            return await asyncio.wait_for(asyncio.shield(cls._Internal.published), timeout)
+        except asyncio.TimeoutError:
+            return cls._Internal.snapshot
+
+    @classmethod
+    def properties(cls) -> dict:
+        return cls._Internal.snapshot.properties
+
+    @classmethod
+    def history(cls, version: int) -> Optional[dict]:
+        """
+        Return the properties as they were at `version`, or `None` if that version is no longer retained.
+        """
+        for retained_version, properties in cls._Internal.history:
+            if retained_version == version:
+                return properties
+        return None
+
+    @staticmethod
+    def _source_layer(source_data: dict) -> Optional[dict]:
+        source = source_data.get('source')
+        # We don't want to include data from sources that aren't `ok`
+        if source is None or not source.available:
+            return None
+        props = source.properties.to_dict() if isinstance(source.properties, ImmutableDict) else source.properties
+        namespace = source_data.get('namespace')
+        if not namespace:
+            # Hand the source's own dict to the merge so unchanged layers can be skipped by identity
+            return props
+        layer: dict = {}
+        _put_in_dict(layer, namespace, ':', props)
+        return layer
 
     @classmethod
     def sources(cls) -> OrderedDict:
@@ -199,12 +327,13 @@ class SourceManager(metaclass=Singleton):
     @classmethod
     def source_diff(cls, new_sources: List[Tuple[str, str]]) -> dict:
         existing_sources: List[Tuple[str, str]] = []
-        for existing_source in cls.sources().values():
-            source = existing_source.get('source')
-            if source.name not in ['ec2-metadata', 'ec2-tags']:
-                existing_sources.append((source.name, source.identity))
-        to_add = [i for i in new_sources if i not in existing_sources]
-        to_remove = [cls.sources().get(i[0], {}).get('source') for i in existing_sources if i not in new_sources]
+        with cls._Internal.lock:
+            for existing_source in cls.sources().values():
+                source = existing_source.get('source')
+                if source.name not in ['ec2-metadata', 'ec2-tags']:
+                    existing_sources.append((source.name, source.identity))
+            to_add = [i for i in new_sources if i not in existing_sources]
+            to_remove = [cls.sources().get(i[0], {}).get('source') for i in existing_sources if i not in new_sources]
         return {
             'add': to_add,
             'remove': to_remove
@@ -213,33 +342,70 @@ class SourceManager(metaclass=Singleton):
     @classmethod
     def identity(cls, name, source_type, options):
         hashid = hashlib.sha1()
-        for attr in [name, source_type, repr(sorted(frozenset(options.items()))).encode('utf-8')]:
+        # Parameters can hold lists and mappings, which can't go in a set, so they're compared by canonical JSON
+        for attr in [name, source_type, json.dumps(options, sort_keys=True, default=str).encode('utf-8')]:
             hashid.update(attr)
 
         return hashid.hexdigest()
 
+    ###
+    # Health
+    ###
+    @classmethod
+    def _invalidate_health(cls, **kwargs) -> None:
+        source = kwargs.get('source')
+        if source is not None:
+            cls._Internal.unchecked.add(source.name)
+
     @classmethod
-    def health(cls):
-        resp = {
-            'code': HTTPStatus.OK,
-            'status': SourceStatus.OK,
-            'indices': [],
-            'sources': []
-        }
+    def _check_health(cls) -> None:
+        """
+        Refresh the cached status of every source that changed since it was last checked.
+        """
+        if not cls._Internal.unchecked:
+            return
+        indices_changed = False
+        with cls._Internal.lock:
+            while cls._Internal.unchecked:
+                name = cls._Internal.unchecked.pop()
+                indices_changed = indices_changed or name in cls._Internal.indices or \
+                    name in cls._Internal.index_statuses
+                for kind, registry, statuses in [('index', cls._Internal.indices, cls._Internal.index_statuses),
+                                                 ('source', cls._Internal.sources, cls._Internal.source_statuses)]:
+                    source_data = registry.get(name)
+                    if source_data is None:
+                        statuses.pop(name, None)
+                        cls._Internal.failing.pop((kind, name), None)
+                        continue
+                    source = source_data.get('source')
+                    statuses[name] = source.status()
+                    if source.ok:
+                        cls._Internal.failing.pop((kind, name), None)
+                    else:
+                        cls._Internal.failing[(kind, name)] = statuses[name]
+            if indices_changed:
+                cls._Internal.ready = bool(cls._Internal.index_statuses) and all(
+                    i.get('ok') and i.get('state') in _healthy_states for i in cls._Internal.index_statuses.values()
+                )
+            cls._Internal.health = None
 
-        for i in cls.indices().values():
-            idx = i.get('source')
-            if not idx.ok:
-                idx_status = idx.status()
-                resp['code'] = HTTPStatus.INTERNAL_SERVER_ERROR
-                resp['status'] = idx_status.get('status')
-            resp['indices'].append(idx.status())
-
-        for source in cls.sources().values():
-            source = source.get('source')
-            source_status = source.status()
-            if not source.ok:
-                resp['code'] = HTTPStatus.INTERNAL_SERVER_ERROR
-                resp['status'] = source_status.get('status')
-            resp['sources'].append(source.status())
-        return resp
+    @classmethod
+    def ready(cls) -> bool:
+        """
+        Whether the index has been loaded and is healthy, so properties are safe to serve.
+        """
+        cls._check_health()
+        return cls._Internal.ready
+
+    @classmethod
+    def health(cls) -> dict:
+        cls._check_health()
+        if cls._Internal.health is None:
+            failing = list(cls._Internal.failing.values())
+            cls._Internal.health = {
+                'code': HTTPStatus.INTERNAL_SERVER_ERROR if failing else HTTPStatus.OK,
+                'status': failing[-1].get('status') if failing else SourceStatus.OK,
+                'indices': list(cls._Internal.index_statuses.values()),
+                'sources': list(cls._Internal.source_statuses.values())
+            }
+        return cls._Internal.health
@@ -0,0 +1,140 @@
+import hashlib
+from typing import Optional, Any, Callable, Dict, List, Tuple
+
+from propsd.util.compression import available_encodings, compress, compressible
+from propsd.util.serialization import JSON, serialize
+
+
+class Body:
+    """
+    An encoded response body along with the strong entity tag identifying it and its compressed variants.
+    Bodies are compressed once, when they're created, rather than for every response. Bodies built for a
+    single response aren't `eager` and only compress the variant that's asked for.
+    """
+    __slots__ = 'data', 'etag', 'mimetype', 'encodings', '_eager'
+
+    def __init__(self, data: bytes, mimetype: str = JSON, eager: bool = True) -> None:
+        self.data = data
+        self.etag = hashlib.sha1(data).hexdigest()
+        self.mimetype = mimetype
+        self.encodings: Dict[str, bytes] = compress(data) if eager else {}
+        self._eager = eager
+
+    def __repr__(self):
+        return '<{}: {} bytes, etag {}>'.format(self.__class__.__name__, len(self.data), self.etag)
+
+    @property
+    def codings(self) -> List[str]:
+        """
+        Content codings the body may be sent in.
+        """
+        if self._eager:
+            return list(self.encodings)
+        return available_encodings() if compressible(self.data) else []
+
+    def encoded(self, coding: Optional[str]) -> Optional[Tuple[bytes, str]]:
+        """
+        Return the body and entity tag for the `coding` variant, or the identity variant for `None`. Returns
+        `None` if the body doesn't get any smaller in `coding`.
+        """
+        if coding is None:
+            return self.data, self.etag
+        if coding not in self.encodings and not self._eager:
+            self.encodings.update(compress(self.data, [coding]))
+        if coding not in self.encodings:
+            return None
+        return self.encodings[coding], '{}-{}'.format(self.etag, coding)
+
+    @classmethod
+    def serialize(cls, obj: Any, mimetype: str = JSON, eager: bool = True) -> 'Body':
+        return cls(serialize(obj, mimetype), mimetype, eager)
+
+
+Path = Tuple[str, ...]
+
+_missing = object()
+
+
+class Snapshot:
+    """
+    A fully resolved, read-only view of the merged properties. A new snapshot is published by the
+    `SourceManager` whenever a source updates, so consumers must never mutate `properties`.
+
+    Snapshots index the subtrees that have been requested along with their bodies in every format asked for.
+    When a snapshot replaces `previous`, indexed subtrees that are still the same object are carried over
+    instead of being encoded again.
+    """
+    __slots__ = '_properties', '_version', '_body', '_index', '_derived'
+
+    def __init__(self, properties: Optional[dict] = None, previous: Optional['Snapshot'] = None) -> None:
+        self._properties = properties if properties is not None else {}
+        self._version = previous.version + 1 if previous is not None else 0
+        # Encode the document once up front so requests only ever write out bytes
+        self._body = Body.serialize(self._properties)
+        self._index: Dict[Path, Tuple[Any, Dict[str, Body]]] = {}
+        self._derived: Dict[str, Any] = {}
+        if previous is not None:
+            for path, (node, bodies) in list(previous._index.items()):
+                if self._find(path) is node:
+                    self._index[path] = (node, bodies)
+
+    def __repr__(self):
+        return '<{}: version {}, etag {}>'.format(self.__class__.__name__, self._version, self.etag)
+
+    @property
+    def properties(self) -> dict:
+        return self._properties
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def body(self) -> Body:
+        return self._body
+
+    @property
+    def etag(self) -> str:
+        return self._body.etag
+
+    def _find(self, path: Path) -> Any:
+        node: Any = self._properties
+        for key in path:
+            if not isinstance(node, dict) or key not in node:
+                return _missing
+            node = node[key]
+        return node
+
+    def get(self, path: Path) -> Any:
+        """
+        Return the subtree at `path`, raising a `KeyError` if it doesn't exist.
+        """
+        entry = self._index.get(path)
+        if entry is not None:
+            return entry[0]
+        node = self._find(path)
+        if node is _missing:
+            raise KeyError(path)
+        return node
+
+    def body_at(self, path: Path, mimetype: str = JSON) -> Body:
+        """
+        Return the subtree at `path` encoded as `mimetype`, raising a `KeyError` if it doesn't exist.
+        """
+        if not path and mimetype == JSON:
+            return self._body
+        entry = self._index.get(path)
+        if entry is None:
+            entry = self._index[path] = (self.get(path), {})
+        node, bodies = entry
+        if mimetype not in bodies:
+            bodies[mimetype] = Body.serialize(node, mimetype)
+        return bodies[mimetype]
+
+    def derive(self, name: str, factory: Callable[['Snapshot'], Any]) -> Any:
+        """
+        Return the value computed by `factory` for this snapshot, calling it only the first time `name` is asked for.
+        """
+        if name not in self._derived:
+            self._derived[name] = factory(self)
+        return self._derived[name]
@@ -1,6 +1,19 @@
-from propsd.sources.metadata import MetadataSource
-from propsd.sources.s3 import S3Source
-from propsd.sources.s3.index import S3Index
-from propsd.sources.tags import TagsSource
-from propsd.sources.consul import ConsulSource
-from propsd.sources.kubernetes import KubernetesSource
+import importlib
+
+# Source classes are imported on first access so importing `propsd.sources` doesn't load every client library
+_classes = {
+    'MetadataSource': 'propsd.sources.metadata',
+    'S3Source': 'propsd.sources.s3',
+    'S3Index': 'propsd.sources.s3.index',
+    'TagsSource': 'propsd.sources.tags',
+    'ConsulSource': 'propsd.sources.consul',
+    'KubernetesSource': 'propsd.sources.kubernetes',
+}
+
+__all__ = list(_classes)
+
+
+def __getattr__(name):
+    if name not in _classes:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    return getattr(importlib.import_module(_classes[name]), name)
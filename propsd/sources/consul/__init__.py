@@ -1,20 +1,30 @@
+import fnmatch
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
 
 import consul
 from requests.exceptions import ConnectionError
 
-from propsd.config import settings
+from propsd.config import settings, to_seconds
 from propsd.sources.factory import SourceFactory
 from propsd.sources.source import Source
 from propsd.enums import SourceStatus, SourceEvents
 from propsd.sources.consul.parser import ConsulParser
 
+# Source parameters that select what's read from Consul rather than how to connect to it
+_filters = ['services', 'tags', 'node_meta']
+
 
 @SourceFactory('consul')
 class ConsulSource(Source):
+    # pylint: disable=invalid-name
+    DEFAULT_WAIT = 25  # in seconds
+    DEFAULT_CONCURRENCY = 8
+    # pylint: enable=invalid-name
     _logger: logging.Logger = logging.getLogger(__name__)
     _parser: ConsulParser = ConsulParser()
+    blocking = True
 
     def __init__(self, name, opts: Optional[dict] = None):
         default_options = {
@@ -26,23 +36,88 @@ class ConsulSource(Source):
 
         super().__init__(name, 1, options)
 
-        self._client = consul.Consul(**options)
+        # The datacenter is passed to the client, which adds it to every query
+        self._client = consul.Consul(**{k: v for k, v in options.items() if k not in _filters})
+        # Only services whose name matches one of these globs and whose instances have all of these tags are read
+        self._service_globs: List[str] = self._as_list(options.get('services')) or ['*']
+        self._tags: List[str] = self._as_list(options.get('tags'))
+        self._node_meta: Optional[Dict[str, str]] = options.get('node_meta') or None
         self._catalog = consul.Consul.Catalog(self._client)
         self._health = consul.Consul.Health(self._client)
+        # Blocking queries have to return before the source's next interval or that run is skipped
+        self._wait = '{}s'.format(to_seconds(settings.get('consul.wait')) or self.DEFAULT_WAIT)
+        self._executor = ThreadPoolExecutor(max_workers=settings.get('consul.concurrency') or self.DEFAULT_CONCURRENCY,
+                                            thread_name_prefix='consul')
+        # Raft indices of the last health and catalog state we read, and the check indices of each service
+        self._health_index: Optional[str] = None
+        self._catalog_index: Optional[str] = None
+        self._check_indices: Dict[str, int] = {}
+        self._services: Dict[str, list] = {}
+
+    @staticmethod
+    def _as_list(value) -> List[str]:
+        if not value:
+            return []
+        return [value] if isinstance(value, str) else list(value)
+
+    @staticmethod
+    def _check_indices_by_service(checks: Iterable[dict]) -> Dict[str, int]:
+        indices: Dict[str, int] = {}
+        for check in checks:
+            service = check.get('ServiceName', '')
+            indices[service] = max(indices.get(service, 0), check.get('ModifyIndex', 0))
+        return indices
+
+    def _wanted(self, service: str, tags: List[str]) -> bool:
+        # The catalog lists the tags of every instance of a service, so this only rules out services where no
+        # instance could have all the required tags
+        return any(fnmatch.fnmatchcase(service, glob) for glob in self._service_globs) and \
+            all(tag in tags for tag in self._tags)
+
+    def _service_health(self, service: str) -> list:
+        # Consul filters by one tag so any others are checked here
+        nodes = self._health.service(service, passing=True, tag=self._tags[0] if self._tags else None,
+                                     node_meta=self._node_meta)[1]
+        if len(self._tags) > 1:
+            nodes = [n for n in nodes if all(tag in (n.get('Service', {}).get('Tags') or []) for tag in self._tags)]
+        return nodes
 
     def _get(self):
-        raw_data = {}
         try:
-            services = self._catalog.services(consistency='stale')
+            # Wait until any check changes state, or `wait` passes...
+            health_index, checks = self._health.state('any', index=self._health_index, wait=self._wait,
+                                                      node_meta=self._node_meta)
+            # ...then see whether the services themselves changed while we were waiting
+            catalog_index, services = self._catalog.services(consistency='stale', node_meta=self._node_meta)
+            services = [s for s, tags in services.items() if self._wanted(s, tags)]
+            wanted: Set[str] = set(services)
+
+            check_indices = self._check_indices_by_service(c for c in checks
+                                                           if not c.get('ServiceName') or c['ServiceName'] in wanted)
+            if catalog_index != self._catalog_index or check_indices.get('') != self._check_indices.get(''):
+                # Services were registered or deregistered, or a node check changed, which affects every service
+                # on the node, so everything has to be read again
+                changed = list(services)
+            else:
+                changed = [s for s in services if check_indices.get(s) != self._check_indices.get(s)]
+            fetched = dict(zip(changed, self._executor.map(self._service_health, changed)))
         except (consul.ConsulException, ConnectionError) as ex:
             self._logger.error('Source/Consul: Caught the following error: %s', ex)
             self._status = SourceStatus.ERROR
+            self._send_event(SourceEvents.ERROR, source=self)
+            # Indices may have been reset, so start over with a full read
+            self._health_index = None
+            self._catalog_index = None
             return None
-        for service in services[1]:
-            service_data = self._health.service(service, passing=True)
-            raw_data[service] = service_data[1]
-
-        self._status = SourceStatus.OK
-        properties = self._parser.parse(raw_data)
-        self._send_event(SourceEvents.UPDATE, source=self, data=properties)
-        self.properties = properties
+
+        # Indices going backwards means the cluster's state was reset, so the next query mustn't block on it
+        self._health_index = health_index if self._health_index is None or \
+            int(health_index) >= int(self._health_index) else None
+        self._catalog_index = catalog_index
+        self._check_indices = check_indices
+        self._services = {s: fetched[s] if s in fetched else self._services.get(s, []) for s in services}
+        self._logger.debug('Source/Consul: Read health of %d of %d services', len(changed), len(services))
+
+        # Always published, since a service being deregistered changes properties without fetching anything.
+        # Unchanged properties are only sent as a `NO_UPDATE`.
+        self._update(self._parser.parse(self._services))
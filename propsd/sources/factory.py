@@ -1,13 +1,37 @@
+import importlib
 import logging
-from typing import TYPE_CHECKING, Dict, Type, Optional, List
+from typing import TYPE_CHECKING, Dict, Type, Optional
 
 if TYPE_CHECKING:
     from propsd.sources.source import Source
 
+# Modules providing the built-in source types. They're only imported once a source of that type is asked for
+# so the clients they depend on aren't loaded for sources that are never configured.
+_modules: Dict[str, str] = {
+    'ec2-metadata': 'propsd.sources.metadata',
+    'ec2-tags': 'propsd.sources.tags',
+    'kubernetes': 'propsd.sources.kubernetes',
+    'consul': 'propsd.sources.consul',
+    's3': 'propsd.sources.s3',
+    's3-index': 'propsd.sources.s3.index',
+}
+# Third party packages can provide source types by registering modules under this entry point group
+_entry_point_group = 'propsd.sources'
+
 _sources: Dict[str, Type['Source']] = {}
 _logger: logging.Logger = logging.getLogger(__name__)
 
 
+def _entry_point(source_type: str) -> Optional[str]:
+    try:
+        import pkg_resources
+    except ImportError:
+        return None
+    for entry_point in pkg_resources.iter_entry_points(_entry_point_group, source_type):
+        return entry_point.module_name
+    return None
+
+
 class SourceFactory:
     def __init__(self, source_type: str) -> None:
         self.type = source_type
@@ -19,8 +43,24 @@ class SourceFactory:
             _logger.debug('SourceFactory: Registered %s source', self.type)
         return cls
 
+    @staticmethod
+    def load(source_type: str) -> None:
+        """
+        Import the module providing `source_type`, which registers it with the factory.
+        """
+        if source_type in _sources:
+            return
+        module = _modules.get(source_type) or _entry_point(source_type)
+        if module is None:
+            return
+        try:
+            importlib.import_module(module)
+        except ImportError as ex:
+            _logger.error('SourceFactory: Unable to load %s source from %s: %s', source_type, module, ex)
+
     @staticmethod
     def new(source_type: str) -> Optional[Type['Source']]:
+        SourceFactory.load(source_type)
         source = _sources.get(source_type)
         if source is None:
             _logger.warning('SourceFactory: Unable to find source of type %s', source_type)
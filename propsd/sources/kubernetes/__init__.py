@@ -1,10 +1,14 @@
 import logging
+import threading
+from datetime import datetime
 from typing import Optional
 import socket
 from kubernetes import client, config
 
-from propsd.enums import SourceEvents
+from propsd.enums import SourceEvents, SourceState
 from propsd.sources.factory import SourceFactory
+from propsd.sources.kubernetes.parser import KubernetesParser
+from propsd.sources.kubernetes.watch import ResourceWatch
 from propsd.sources.source import Source
 
 _k8s_namespace_file = '/var/run/secrets/kubernetes.io/serviceaccount/namespace'
@@ -13,7 +17,12 @@ _k8s_namespace_file = '/var/run/secrets/kubernetes.io/serviceaccount/namespace'
 @SourceFactory('kubernetes')
 class KubernetesSource(Source):
     _logger: logging.Logger = logging.getLogger(__name__)
+    _parser: KubernetesParser = KubernetesParser()
     _enabled: bool = True
+    _pods: Optional[ResourceWatch] = None
+    _services: Optional[ResourceWatch] = None
+    # The node is only known once the pod has been read
+    _nodes: Optional[ResourceWatch] = None
 
     def __init__(self, opts: Optional[dict] = None):
         super().__init__('kubernetes', 1, opts)
@@ -30,11 +39,50 @@ class KubernetesSource(Source):
         # Now we get the namespace the pod is deployed in.
         self._namespace = ''
         with open(_k8s_namespace_file, 'r') as f:
-            self._namespace = f.read()
+            self._namespace = f.read().strip()
         self._client = client.CoreV1Api()
+        self._lock = threading.Lock()
+
+        # Changes are streamed from the API server by watches. Polling only publishes what they've collected.
+        self._pods = ResourceWatch('pod', self._client.list_namespaced_pod, self._changed,
+                                   namespace=self._namespace,
+                                   field_selector='metadata.name={}'.format(self._pod_name))
+        self._services = ResourceWatch('services', self._client.list_namespaced_service, self._changed,
+                                       namespace=self._namespace)
+        self._pods.start()
+        self._services.start()
+
+    def _changed(self) -> None:
+        """
+        Called from the watch threads. Polls the source at once instead of waiting for its next interval.
+        """
+        if self._state == SourceState.SHUTDOWN or self._pods is None:
+            return
+        pod = self._pods.objects.get(self._pod_name)
+        with self._lock:
+            if self._nodes is None and pod is not None and pod.spec.node_name:
+                self._nodes = ResourceWatch('node', self._client.list_node, self._changed,
+                                            field_selector='metadata.name={}'.format(pod.spec.node_name))
+                self._nodes.start()
+        job = self.job
+        if job is not None:
+            job.modify(next_run_time=datetime.now())
+
+    def shutdown(self):
+        super().shutdown()
+        for resource_watch in [self._pods, self._services, self._nodes]:
+            if resource_watch is not None:
+                resource_watch.stop()
 
     def _get(self):
         if not self._enabled:
             self._logger.debug('Source/K8S: Source is disabled because we are not running in a k8s cluster.')
-        pass
-
+            return
+        nodes = self._nodes.objects if self._nodes is not None else {}
+        pod = self._pods.objects.get(self._pod_name)
+        properties = self._parser.parse({
+            'pod': pod,
+            'node': nodes.get(pod.spec.node_name) if pod is not None else None,
+            'services': list(self._services.objects.values())
+        })
+        self._update(properties)
@@ -0,0 +1,59 @@
+from typing import Any, Dict
+
+from propsd.sources.parser import Parser
+
+# Node labels holding the node's zone and region, newest first
+_zone_labels = ['topology.kubernetes.io/zone', 'failure-domain.beta.kubernetes.io/zone']
+_region_labels = ['topology.kubernetes.io/region', 'failure-domain.beta.kubernetes.io/region']
+
+
+def _first_label(labels: dict, names: list):
+    return next((labels[name] for name in names if name in labels), None)
+
+
+def _selects(service, labels: dict) -> bool:
+    selector = service.spec.selector if service.spec else None
+    return bool(selector) and all(labels.get(k) == v for k, v in selector.items())
+
+
+class KubernetesParser(Parser):
+    def parse(self, data: dict) -> dict:
+        """
+        Build properties from the `pod` the source runs in, the `node` it's scheduled on and the `services` in its
+        namespace, keeping the services that select the pod.
+        """
+        properties: Dict[str, Any] = {}
+        pod = data.get('pod')
+        if pod is None:
+            return properties
+
+        labels = dict(pod.metadata.labels or {})
+        properties['namespace'] = pod.metadata.namespace
+        properties['pod'] = {
+            'name': pod.metadata.name,
+            'ip': pod.status.pod_ip if pod.status else None,
+            'host-ip': pod.status.host_ip if pod.status else None,
+            'service-account': pod.spec.service_account_name,
+            'labels': labels,
+            'annotations': dict(pod.metadata.annotations or {})
+        }
+
+        node = data.get('node')
+        if node is not None:
+            node_labels = dict(node.metadata.labels or {})
+            properties['node'] = {
+                'name': node.metadata.name,
+                'zone': _first_label(node_labels, _zone_labels),
+                'region': _first_label(node_labels, _region_labels),
+                'labels': node_labels,
+                'annotations': dict(node.metadata.annotations or {})
+            }
+
+        properties['services'] = {
+            service.metadata.name: {
+                'cluster-ip': service.spec.cluster_ip,
+                'labels': dict(service.metadata.labels or {}),
+                'annotations': dict(service.metadata.annotations or {})
+            } for service in data.get('services', []) if _selects(service, labels)
+        }
+        return properties
@@ -0,0 +1,93 @@
+import logging
+import threading
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Optional
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+# Seconds the API server keeps a watch open before we resume it from the last resourceVersion
+_watch_timeout = 300
+# Seconds to wait before listing again after the API server couldn't be reached
+_retry_delay = 5
+
+
+class ResourceWatch(threading.Thread):
+    """
+    Keep the objects returned by a Kubernetes list call up to date by watching for changes. The objects are
+    listed once, then watched from the list's `resourceVersion`, resuming from the last version seen whenever a
+    watch ends. They're only listed again once the version has expired.
+
+    `on_change` is called from the watch's thread whenever the objects change.
+    """
+
+    def __init__(self, name: str, list_func: Callable, on_change: Callable[[], None], **kwargs: Any) -> None:
+        super().__init__(name='k8s-watch-{}'.format(name), daemon=True)
+        self._list = list_func
+        self._kwargs = kwargs
+        self._on_change = on_change
+        self._objects: Dict[str, Any] = {}
+        self._resource_version: Optional[str] = None
+        self._watch: Optional[watch.Watch] = None
+        self._stopped = threading.Event()
+
+    @property
+    def objects(self) -> Dict[str, Any]:
+        return dict(self._objects)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._watch is not None:
+            self._watch.stop()
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                if self._resource_version is None:
+                    self._relist()
+                self._stream()
+            except ApiException as ex:
+                if ex.status == HTTPStatus.GONE:
+                    self._resource_version = None
+                    continue
+                _logger.error('Source/K8S: Watch %s failed: %s', self.name, ex)
+                self._stopped.wait(_retry_delay)
+            except Exception as ex:  # pylint: disable=broad-except
+                # Dropped connections surface as a range of urllib3 and socket errors
+                _logger.warning('Source/K8S: Watch %s was interrupted: %s', self.name, ex)
+                self._stopped.wait(_retry_delay)
+
+    def _relist(self) -> None:
+        result = self._list(**self._kwargs)
+        self._objects = {item.metadata.name: item for item in result.items}
+        self._resource_version = result.metadata.resource_version
+        _logger.debug('Source/K8S: Listed %d objects for %s at version %s',
+                      len(self._objects), self.name, self._resource_version)
+        self._on_change()
+
+    def _stream(self) -> None:
+        self._watch = watch.Watch()
+        for event in self._watch.stream(self._list, resource_version=self._resource_version,
+                                        timeout_seconds=_watch_timeout, **self._kwargs):
+            if self._stopped.is_set():
+                break
+            if event['type'] == 'ERROR':
+                status = event.get('raw_object') or {}
+                if status.get('code') == HTTPStatus.GONE:
+                    # The version we resumed from has been compacted away so we have to list again
+                    self._resource_version = None
+                else:
+                    _logger.error('Source/K8S: Watch %s returned an error: %s', self.name, status.get('message'))
+                    # Back off so a persistent error doesn't become a reconnect loop against the API server
+                    self._stopped.wait(_retry_delay)
+                break
+            obj = event['object']
+            self._resource_version = obj.metadata.resource_version
+            if event['type'] == 'DELETED':
+                self._objects.pop(obj.metadata.name, None)
+            else:
+                self._objects[obj.metadata.name] = obj
+            self._on_change()
+        self._watch.stop()
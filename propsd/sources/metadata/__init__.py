@@ -1,19 +1,15 @@
-import base64
-import hashlib
 import logging
 import time
-from collections import deque
-from typing import Optional
+from typing import Dict, List, Optional, Set
 
-import boto3
-import requests
 from botocore.exceptions import ClientError
 
-from propsd.config import settings
-from propsd.enums import SourceEvents, SourceStatus
+from propsd.config import settings, to_seconds
 from propsd.sources.factory import SourceFactory
-from propsd.sources.metadata.parser import mappings, MetadataParser
+from propsd.sources.metadata.client import MetadataClient
+from propsd.sources.metadata.parser import mappings, MetadataParser, Refresh
 from propsd.sources.source import Source
+from propsd.util import clients
 
 
 @SourceFactory('ec2-metadata')
@@ -22,6 +18,7 @@ class MetadataSource(Source):
     VERSION = 'latest'
     DEFAULT_TIMEOUT = 5  # in seconds
     DEFAULT_HOST = '169.254.169.254'
+    DEFAULT_SLOW_INTERVAL = 300  # in seconds
     # pylint: enable=invalid-name
     _logger: logging.Logger = logging.getLogger(__name__)
     _parser: MetadataParser = MetadataParser()
@@ -30,10 +27,15 @@ class MetadataSource(Source):
         super().__init__('ec2-metadata', 1, opts)
         self._host = settings.get('metadata.host') if settings.get('metadata.host') else self.DEFAULT_HOST
         self._timeout = settings.get('metadata.timeout') if settings.get('metadata.timeout') else self.DEFAULT_TIMEOUT
+        self._slow_interval = to_seconds(settings.get('metadata.slow_interval')) or self.DEFAULT_SLOW_INTERVAL
+        # Fetched metadata by path and when each mapped path was last fetched
+        self._metadata: Dict[str, str] = {}
+        self._refreshed: Dict[str, float] = {}
+        self._client = MetadataClient(self._host, self.VERSION, self._timeout, settings.get('metadata.concurrency'))
 
     def _get_autoscaling_group(self, region: str, instance_id: str) -> Optional[str]:
         self._logger.debug('Source/Metadata: Retrieving auto-scaling-group data')
-        autoscaling = boto3.client('autoscaling', region_name=region)
+        autoscaling = clients.client('autoscaling', region)
         try:
             asg = [i.get('AutoScalingGroupName') for i in autoscaling.describe_auto_scaling_instances(
                 InstanceIds=[instance_id]
@@ -46,27 +48,41 @@ class MetadataSource(Source):
             self._logger.warning('Source/Metadata: Instance id %s is in multiple auto-scaling groups', instance_id)
         return asg[0]
 
-    def _get_meta_data(self):
-        url_base = 'http://{}/{}'.format(self._host, self.VERSION)
-        paths = deque(mappings.keys())
-        results = {}
-
-        while paths:
-            path = paths.pop()
-            joined_path = '{}/{}'.format(url_base, path)
-            res = requests.get(joined_path)
-            if res.status_code != 200:
-                self._logger.debug('Source/Metadata: Unable to retrieve metadata from %s. Got HTTP status code %d',
-                                   path,
-                                   res.status_code)
+    @staticmethod
+    def _under(key: str, path: str) -> bool:
+        return key == path or (path.endswith('/') and key.startswith(path))
+
+    def _due(self, now: float) -> List[str]:
+        """
+        Return the mapped paths whose refresh tier says they should be fetched on this poll.
+        """
+        due = []
+        for path, mapping in mappings.items():
+            if mapping.refresh == Refresh.LOCAL:
                 continue
-            if path.endswith('/'):
-                items = res.text.strip().split('\n')
-                for item in items:
-                    paths.append('{}{}'.format(path, item))
-            else:
-                results[path] = res.text
-        return results
+            refreshed = self._refreshed.get(path)
+            if refreshed is None or mapping.refresh == Refresh.VOLATILE or \
+                    (mapping.refresh == Refresh.SLOW and now - refreshed >= self._slow_interval):
+                due.append(path)
+        return due
+
+    def _get_meta_data(self):
+        now = time.monotonic()
+        due = self._due(now)
+        failed: Set[str] = set()
+        fetched = self._client.crawl(due, failed)
+        for path in due:
+            # Whatever was fetched replaces everything cached under the path, including anything that's gone
+            for key in [k for k in self._metadata if self._under(key=k, path=path)]:
+                del self._metadata[key]
+            # Paths that returned nothing, or only part of their tree, are tried again on the next poll
+            # regardless of their tier
+            if any(self._under(key=k, path=path) for k in fetched) and \
+                    not any(self._under(key=k, path=path) for k in failed):
+                self._refreshed[path] = now
+        self._metadata.update(fetched)
+        self._logger.debug('Source/Metadata: Refreshed %d of %d metadata paths', len(due), len(mappings))
+        return dict(self._metadata)
 
     def _get(self) -> None:
         timer = time.time()
@@ -83,25 +99,9 @@ class MetadataSource(Source):
                 self._logger.debug('Source/Metadata: Using cached auto-scaling-group data.')
                 properties['auto-scaling-group'] = self.properties.get('auto-scaling-group')
 
-        sha1 = hashlib.sha1()
-        paths = properties.keys()
-
-        self._logger.debug('Source/Metadata: Fetched %d paths from the ec2-metadata service', len(paths),
+        self._logger.debug('Source/Metadata: Fetched %d paths from the ec2-metadata service', len(properties),
                            extra={'status': self.status()})
-        for path in sorted(paths):
-            sha1.update(path.encode('utf-8'))
-        signature = base64.b64encode(sha1.digest())
-
         self._logger.debug('Source/Metadata: Polled %s source %s in %dms',
-                           self.__class__.__name__, self.name, time.time() - timer,
+                           self.__class__.__name__, self.name, (time.time() - timer) * 1000,
                            extra={'status': self.status()})
-
-        if self._signature == signature:
-            self._status = SourceStatus.NO_UPDATE
-            self._send_event(SourceEvents.NO_UPDATE, source=self)
-            return
-
-        self._status = SourceStatus.OK
-        self._signature = signature
-        self._send_event(SourceEvents.UPDATE, source=self, data=properties)
-        self.properties = properties
+        self._update(properties)
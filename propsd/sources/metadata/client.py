@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class MetadataClient:
+    """
+    A client for the EC2 instance metadata service. Requests share a keep-alive session, carry an IMDSv2
+    session token when the service issues one and are bounded by a timeout. Trees are crawled a level at a
+    time with every path in a level fetched concurrently.
+    """
+    # pylint: disable=invalid-name
+    TOKEN_PATH = 'api/token'
+    TOKEN_HEADER = 'X-aws-ec2-metadata-token'
+    TOKEN_TTL_HEADER = 'X-aws-ec2-metadata-token-ttl-seconds'
+    TOKEN_TTL = 21600  # in seconds
+    # Tokens are renewed this long before they expire so requests in flight never carry a stale one
+    TOKEN_MARGIN = 60  # in seconds
+    DEFAULT_CONCURRENCY = 8
+    # pylint: enable=invalid-name
+    _logger: logging.Logger = logging.getLogger(__name__)
+
+    def __init__(self, host: str, version: str, timeout: float, concurrency: Optional[int] = None) -> None:
+        self._base_url = 'http://{}/{}'.format(host, version)
+        self._timeout = timeout
+        concurrency = concurrency or self.DEFAULT_CONCURRENCY
+        self._session = requests.Session()
+        self._session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='imds')
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._token_lock = threading.Lock()
+
+    def _fetch_token(self) -> Optional[str]:
+        try:
+            res = self._session.put('{}/{}'.format(self._base_url, self.TOKEN_PATH),
+                                    headers={self.TOKEN_TTL_HEADER: str(self.TOKEN_TTL)},
+                                    timeout=self._timeout)
+        except requests.RequestException as ex:
+            self._logger.debug('Source/Metadata: Unable to retrieve an IMDSv2 token: %s', ex)
+            return None
+        if res.status_code != 200:
+            # The service doesn't support IMDSv2 so requests are made without a token
+            self._logger.debug('Source/Metadata: Unable to retrieve an IMDSv2 token. Got HTTP status code %d',
+                               res.status_code)
+            return None
+        return res.text
+
+    def _get_token(self, refresh: bool = False) -> Optional[str]:
+        with self._token_lock:
+            now = time.monotonic()
+            if refresh or now >= self._token_expires:
+                self._token = self._fetch_token()
+                # Retry a missing token on the next expiry instead of every request
+                self._token_expires = now + self.TOKEN_TTL - self.TOKEN_MARGIN
+            return self._token
+
+    def _request(self, path: str, token: Optional[str]) -> requests.Response:
+        headers = {self.TOKEN_HEADER: token} if token else None
+        return self._session.get('{}/{}'.format(self._base_url, path), headers=headers, timeout=self._timeout)
+
+    def get(self, path: str) -> Optional[str]:
+        """
+        Return the body at `path`, or `None` if it couldn't be retrieved.
+        """
+        try:
+            res = self._request(path, self._get_token())
+            if res.status_code == 401:
+                res = self._request(path, self._get_token(refresh=True))
+        except requests.RequestException as ex:
+            self._logger.debug('Source/Metadata: Unable to retrieve metadata from %s: %s', path, ex)
+            return None
+        if res.status_code != 200:
+            self._logger.debug('Source/Metadata: Unable to retrieve metadata from %s. Got HTTP status code %d',
+                               path,
+                               res.status_code)
+            return None
+        return res.text
+
+    def crawl(self, paths: Iterable[str], failed: Optional[Set[str]] = None) -> Dict[str, str]:
+        """
+        Fetch `paths`, following the listing of any path ending in `/`, and return the body of every leaf. Paths
+        that couldn't be retrieved are added to `failed`.
+        """
+        results: Dict[str, str] = {}
+        level = list(paths)
+        while level:
+            next_level: List[str] = []
+            for path, body in zip(level, self._executor.map(self.get, level)):
+                if body is None:
+                    if failed is not None:
+                        failed.add(path)
+                    continue
+                if path.endswith('/'):
+                    next_level.extend('{}{}'.format(path, item) for item in body.strip().split('\n') if item)
+                else:
+                    results[path] = body
+            level = next_level
+        return results
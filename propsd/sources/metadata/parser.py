@@ -1,6 +1,8 @@
 import json
 import re
+from enum import Enum
 from os import path as p
+from typing import Callable, NamedTuple
 
 from propsd.sources.parser import Parser
 
@@ -81,30 +83,47 @@ def macs(path: str, metadata: dict, properties: dict):
     properties['vpc-id'] = metadata.get(p.join(path, mac, 'vpc-id'))
 
 
+class Refresh(Enum):
+    """
+    How often a metadata path changes and so needs fetching again
+    """
+    # pylint: disable=invalid-name
+    # Fixed for the life of the instance, fetched until it's been retrieved once
+    STATIC = 'STATIC'
+    # Changes rarely, such as when an interface or address is attached, fetched every `metadata.slow_interval`
+    SLOW = 'SLOW'
+    # Fetched on every poll
+    VOLATILE = 'VOLATILE'
+    # Computed by the source rather than fetched from the metadata service
+    LOCAL = 'LOCAL'
+
+
+Mapping = NamedTuple('Mapping', [('parse', Callable[[str, dict, dict], None]), ('refresh', Refresh)])
+
 mappings = {
-    'meta-data/ami-id': at_basename,
-    'meta-data/placement/availability-zone': at_basename,
-    'meta-data/hostname': at_basename,
-    'meta-data/instance-id': at_basename,
-    'meta-data/instance-type': at_basename,
-    'meta-data/local-ipv4': at_basename,
-    'meta-data/local-hostname': at_basename,
-    'meta-data/public-hostname': at_basename,
-    'meta-data/public-ipv4': at_basename,
-    'meta-data/reservation-id': at_basename,
-    'meta-data/security-groups': at_basename,
-    'dynamic/instance-identity/document': document,
-    'dynamic/instance-identity/pkcs7': pkcs7,
-    'meta-data/iam/security-credentials/': security_credentials,
-    'meta-data/mac': lambda path, metadata, properties: None,
-    'meta-data/network/interfaces/macs/': macs,
-    'auto-scaling-group': at_basename
+    'meta-data/ami-id': Mapping(at_basename, Refresh.STATIC),
+    'meta-data/placement/availability-zone': Mapping(at_basename, Refresh.STATIC),
+    'meta-data/hostname': Mapping(at_basename, Refresh.STATIC),
+    'meta-data/instance-id': Mapping(at_basename, Refresh.STATIC),
+    'meta-data/instance-type': Mapping(at_basename, Refresh.STATIC),
+    'meta-data/local-ipv4': Mapping(at_basename, Refresh.STATIC),
+    'meta-data/local-hostname': Mapping(at_basename, Refresh.STATIC),
+    'meta-data/public-hostname': Mapping(at_basename, Refresh.SLOW),
+    'meta-data/public-ipv4': Mapping(at_basename, Refresh.SLOW),
+    'meta-data/reservation-id': Mapping(at_basename, Refresh.STATIC),
+    'meta-data/security-groups': Mapping(at_basename, Refresh.SLOW),
+    'dynamic/instance-identity/document': Mapping(document, Refresh.STATIC),
+    'dynamic/instance-identity/pkcs7': Mapping(pkcs7, Refresh.STATIC),
+    'meta-data/iam/security-credentials/': Mapping(security_credentials, Refresh.VOLATILE),
+    'meta-data/mac': Mapping(lambda path, metadata, properties: None, Refresh.STATIC),
+    'meta-data/network/interfaces/macs/': Mapping(macs, Refresh.SLOW),
+    'auto-scaling-group': Mapping(at_basename, Refresh.LOCAL)
 }
 
 
 class MetadataParser(Parser):
     def parse(self, data: dict) -> dict:
         properties = {}
-        for path, fn in mappings.items():
-            fn(path, data, properties)
+        for path, mapping in mappings.items():
+            mapping.parse(path, data, properties)
         return properties
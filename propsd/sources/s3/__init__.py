@@ -1,8 +1,6 @@
 import logging
 from typing import Optional, List
 
-import boto3
-from botocore.client import Config
 from botocore.exceptions import ClientError
 
 from propsd.config import settings
@@ -10,6 +8,7 @@ from propsd.enums import SourceStatus, SourceEvents
 from propsd.sources.factory import SourceFactory
 from propsd.sources.s3.parser import S3Parser
 from propsd.sources.source import Source
+from propsd.util import clients
 
 
 @SourceFactory('s3')
@@ -24,16 +23,10 @@ class S3Source(Source):
         super().__init__(name, instances, opts)
         if not opts:
             opts = {}
-        s3_opts = {}
 
-        # If an endpoint is supplied in configuration we need to set a few special options
-        endpoint = settings.get('index.endpoint')
-        if endpoint:
-            s3_opts['endpoint_url'] = endpoint
-            s3_opts['use_ssl'] = False
-            s3_opts['config'] = Config(s3={'addressing_style': 'path'})
-
-        region = opts.get('region', 'us-east-1')
+        # An endpoint supplied in configuration is addressed path style, e.g. for localstack
+        self._endpoint = settings.get('index.endpoint')
+        self._region = opts.get('region', 'us-east-1')
         self._bucket = opts.get('bucket')
         self._path = opts.get('path')
 
@@ -42,7 +35,9 @@ class S3Source(Source):
         if not self._path:
             raise AttributeError('Source/S3: Missing required parameter `path`!')
 
-        self._client = boto3.client('s3', region, **s3_opts)
+    @property
+    def _client(self):
+        return clients.client('s3', self._region, self._endpoint, 'path' if self._endpoint else None)
 
     def _get_object(self) -> Optional[dict]:
         req = {
@@ -88,8 +83,7 @@ class S3Source(Source):
         self._response = obj
         version, properties, sources = self._parser.parse(obj.get('Body'))
         self._version = version
-        # Use the setter so it's wrapped in an ImmutableDict
-        self._send_event(SourceEvents.UPDATE, source=self, data=properties)
-        self.properties = properties
         self._sources = sources
+        # A new object can still hold the same properties, e.g. when only the index's sources changed
+        self._update(properties)
         return obj
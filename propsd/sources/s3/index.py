@@ -1,21 +1,16 @@
-import json
 import logging
-import re
 from typing import Optional, List
 
-from jinja2 import Environment
-
 from propsd.sourcemanager import SourceManager
 from propsd.sources.factory import SourceFactory
 from propsd.sources.s3 import S3Source
-from propsd.util import convert_to_object_access
-from propsd.util.template import PreserveUndefined
+from propsd.util import clients
+from propsd.util.interpolation import render
 
 
 @SourceFactory('s3-index')
 class S3Index(S3Source):
     _sources: List[dict] = []
-    _env: Environment = Environment(undefined=PreserveUndefined)
     _logger: logging.Logger = logging.getLogger(__name__)
 
     def __init__(self, opts: Optional[dict] = None):
@@ -53,21 +48,14 @@ class S3Index(S3Source):
     def _create_index_from_template(self):
         all_properties = SourceManager.properties()
         # Now we iterate through sources, resolve paths from existing parameters, and then
-        # add the new sources to the SourceManager.
-        #
-        # First we have to prep our source object to make sure we replace `:` with a python object so
-        # Jinja can index correctly.
-        template = self._env.from_string(
-            re.sub(r'{{ ?(.+?) ?}}', convert_to_object_access, json.dumps(self._sources))
-        )
-        # Then we load the fixed JSON back in so we have the built sources list.
-        sources = json.loads(template.render(all_properties))
+        # add the new sources to the SourceManager. Rendering shares untouched definitions with
+        # `self._sources` so we copy anything we modify.
+        sources = [dict(s) for s in render(self._sources, all_properties)]
         # Add the bucket to every source dict
         for source in sources:
-            type = source.get('type')
             params = source.get('parameters', {})
-            if 'bucket' not in params and type == 's3':
-                params['bucket'] = self._bucket
+            if 'bucket' not in params and source.get('type') == 's3':
+                source['parameters'] = {**params, 'bucket': self._bucket}
         return sources
 
     def _get(self):
@@ -88,6 +76,8 @@ class S3Index(S3Source):
             ) for s in sources
         ]
         actions = SourceManager.source_diff(identity)
+        # Every source the index declares may poll at once, so size the shared connection pools for them
+        clients.reserve(len(sources) + 1)
 
         # Now we iterate through the resolved sources we need to add...
         self._add_sources(sources, actions.get('add', []))
@@ -1,21 +1,67 @@
 import json
 import logging
+from decimal import Decimal
 from typing import Tuple, Optional
 
 from botocore.response import StreamingBody
-from jinja2 import Environment
 
 from propsd.sources.parser import Parser
 
+try:
+    from ijson.common import JSONError, ObjectBuilder
+    # The other backends are slower than reading the whole body with `json.loads`
+    try:
+        import ijson.backends.yajl2_c as ijson
+    except ImportError:
+        import ijson
+except ImportError:
+    ijson = None
+    JSONError = ValueError
+
 logger = logging.getLogger(__name__)
 
+# Top level keys of a properties document. Anything else in it is skipped without being built.
+_fields = ['version', 'properties', 'sources']
+
+
+def _parse_stream(data: StreamingBody) -> dict:
+    """
+    Build the top level fields of the document as it's read, so only the values kept are ever held in memory.
+    """
+    document = {}
+    field, builder, depth = None, None, 0
+    for prefix, event, value in ijson.parse(data):
+        if not prefix:
+            # Keys can contain dots, which ijson also joins prefixes with, so the field being read is tracked
+            # from the root object's keys rather than split out of the prefix
+            if event == 'map_key':
+                field = value if value in _fields else None
+            continue
+        if field is None:
+            continue
+        if builder is None:
+            builder = ObjectBuilder()
+        # Values are emitted as `Decimal`s, which none of the formats we serve can encode
+        builder.event(event, float(value) if isinstance(value, Decimal) else value)
+        if event in ('start_map', 'start_array'):
+            depth += 1
+        elif event in ('end_map', 'end_array'):
+            depth -= 1
+        if depth == 0 and event != 'map_key':
+            document[field] = builder.value
+            field, builder = None, None
+    return document
+
 
 class S3Parser(Parser):
     def parse(self, data: StreamingBody) -> Tuple[Optional[int], dict, list]:
-        body = data.read().decode('utf-8')
         try:
-            body = json.loads(body)
-        except json.JSONDecodeError:
+            # Without ijson the whole body is read, but parsed from bytes to skip decoding it into another copy
+            body = _parse_stream(data) if ijson is not None else json.loads(data.read())
+        except (ValueError, JSONError):
             logger.warning('Source/S3/Parser: Unable to parse index body as JSON')
             return None, {}, []
+        if not isinstance(body, dict):
+            logger.warning('Source/S3/Parser: Index body is not a JSON object')
+            return None, {}, []
         return body.get('version'), body.get('properties', {}), body.get('sources', [])
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, TYPE_CHECKING, Union
+from typing import Mapping, Optional, TYPE_CHECKING, Union
 
 from propsd.enums import SourceEvents, SourceState
 from propsd.sourcemanager import SourceManager
@@ -59,7 +59,7 @@ class Schedulable:
         self._state = SourceState.SHUTDOWN
         self._send_event(SourceEvents.SHUTDOWN, source=self)
 
-    def _send_event(self, event: SourceEvents, **kwargs: Optional[Union['Schedulable', dict]]) -> None:
+    def _send_event(self, event: SourceEvents, **kwargs: Optional[Union['Schedulable', Mapping]]) -> None:
         self.events[event].send_robust(sender=self.__class__, **kwargs)
 
 
@@ -1,7 +1,12 @@
+import asyncio
+import hashlib
+import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Mapping, Union, Type, TYPE_CHECKING
 
-from propsd.enums import SourceStatus, SourceState
+from propsd.config import settings
+from propsd.enums import SourceStatus, SourceState, SourceEvents
 from propsd.sourcemanager import SourceManager
 from propsd.sources.schedulable import Schedulable
 from propsd.util.immutabledict import ImmutableDict
@@ -9,6 +14,22 @@ from propsd.util.immutabledict import ImmutableDict
 if TYPE_CHECKING:
     from propsd.sources.parser import Parser
 
+# Number of sources that may be fetching at once when `service.poll_workers` isn't set
+_default_workers = 8
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor  # pylint: disable=global-statement
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.get('service.poll_workers') or _default_workers,
+                                       thread_name_prefix='source')
+    return _executor
+
+
+def _canonical(obj):
+    return dict(obj) if isinstance(obj, Mapping) else str(obj)
+
 
 class Source(Schedulable):
     _properties: ImmutableDict = ImmutableDict()
@@ -17,8 +38,11 @@ class Source(Schedulable):
     name: str = ''
     _status: Optional[SourceStatus] = None
     _signature: Optional[Union[str, bytes]] = None
+    _fingerprint: Optional[bytes] = None
     _logger: logging.Logger = logging.getLogger(__name__)
     _parser: Optional[Type['Parser']] = None
+    # Blocking sources wait in `_get` until their data changes and are polled again as soon as they return
+    blocking: bool = False
 
     def __init__(self, name: str, instances: Optional[int] = None, opts: Optional[dict] = None) -> None:
         super().__init__()
@@ -45,6 +69,32 @@ class Source(Schedulable):
     def properties(self, properties: Mapping, merge: bool = False):
         self._properties = self._properties.update(**properties) if merge else ImmutableDict(properties)
 
+    @staticmethod
+    def fingerprint(properties: Mapping) -> bytes:
+        """
+        Digest of the keys and values of `properties`, independent of the order they were added in.
+        """
+        canonical = json.dumps(properties, sort_keys=True, separators=(',', ':'), ensure_ascii=False,
+                               default=_canonical)
+        return hashlib.blake2b(canonical.encode('utf-8'), digest_size=20).digest()
+
+    def _update(self, properties: Mapping) -> bool:
+        """
+        Publish freshly parsed `properties`, sending an `UPDATE` if they differ from the current ones and a
+        `NO_UPDATE` otherwise. Returns whether they changed.
+        """
+        fingerprint = self.fingerprint(properties)
+        if fingerprint == self._fingerprint:
+            self._status = SourceStatus.NO_UPDATE
+            self._send_event(SourceEvents.NO_UPDATE, source=self)
+            return False
+
+        self._status = SourceStatus.OK
+        self._fingerprint = fingerprint
+        self._properties = ImmutableDict(properties)
+        self._send_event(SourceEvents.UPDATE, source=self, data=self._properties)
+        return True
+
     @property
     def ok(self):
         return self._status not in [SourceStatus.ERROR, SourceStatus.WARNING, SourceState.SHUTDOWN]
@@ -64,7 +114,11 @@ class Source(Schedulable):
             self._logger.info('Source: Source {} has been shutdown, but not unscheduled.'.format(self.name))
             return
         self._pre_get()
-        self._get()
+        # Fetches do blocking I/O so they run on worker threads, leaving the event loop free to serve requests.
+        # Blocking sources hold their thread for as long as they wait so they use the loop's default executor
+        # rather than taking workers from sources that poll.
+        executor = None if self.blocking else _get_executor()
+        await asyncio.get_event_loop().run_in_executor(executor, self._get)
         self._post_get()
 
     def _get(self):
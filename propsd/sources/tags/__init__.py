@@ -1,17 +1,14 @@
-import base64
-import hashlib
 import json
 import logging
 from typing import Optional
 
-import boto3
-import requests
-
 from propsd.config import settings
-from propsd.enums import SourceEvents, SourceStatus
+from propsd.sourcemanager import SourceManager
 from propsd.sources.factory import SourceFactory
+from propsd.sources.metadata.client import MetadataClient
 from propsd.sources.source import Source
 from propsd.sources.tags.parser import TagsParser
+from propsd.util import clients
 
 
 @SourceFactory('ec2-tags')
@@ -20,48 +17,48 @@ class TagsSource(Source):
     VERSION = 'latest'
     DEFAULT_TIMEOUT = 5  # in seconds
     DEFAULT_HOST = '169.254.169.254'
+    DOCUMENT_PATH = 'dynamic/instance-identity/document'
+    TAGS_PATH = 'meta-data/tags/instance/'
     # pylint: enable=invalid-name
     _logger: logging.Logger = logging.getLogger(__name__)
     _parser: TagsParser = TagsParser()
 
     def __init__(self, opts: Optional[dict] = None):
         super().__init__('ec2-tags', 1, opts)
-        self._host = settings.get('metadata.host') if settings.get('metadata.host') else self.DEFAULT_TIMEOUT
+        self._host = settings.get('metadata.host') if settings.get('metadata.host') else self.DEFAULT_HOST
         self._timeout = settings.get('metadata.timeout') if settings.get('metadata.timeout') else self.DEFAULT_TIMEOUT
+        # Read tags from the metadata service unless it's been turned off, falling back to the EC2 API
+        self._use_metadata = settings.get('tags.metadata', True)
+        self._client = MetadataClient(self._host, self.VERSION, self._timeout, settings.get('metadata.concurrency'))
 
-    def _get_metadata_document(self):
-        base_url = 'http://{}/{}'.format(self._host, self.VERSION)
-        document_path = 'dynamic/instance-identity/document'
-        res = requests.get('{}/{}'.format(base_url, document_path))
-        if res.status_code != 200:
-            self._logger.debug('Source/Tags: Unable to retrieve metadata from %s. Got HTTP status code %d',
-                               document_path,
-                               res.status_code)
-            return {}
-        return res.json()
+    def _get_metadata_document(self) -> dict:
+        # The metadata source already has the identity document, so only fetch it if it hasn't run yet
+        metadata_source = SourceManager.sources().get('ec2-metadata', {}).get('source')
+        document = metadata_source.properties.get('identity', {}).get('document') if metadata_source else None
+        if document is None:
+            document = self._client.get(self.DOCUMENT_PATH)
+        return json.loads(document) if document else {}
 
-    def _get(self) -> None:
+    def _get_metadata_tags(self) -> Optional[dict]:
+        """
+        Read the instance's tags from the metadata service, or return `None` if it doesn't expose them.
+        """
+        tags = self._client.crawl([self.TAGS_PATH])
+        if not tags:
+            return None
+        return {'Tags': [{'Key': path[len(self.TAGS_PATH):], 'Value': value} for path, value in tags.items()]}
+
+    def _get_api_tags(self) -> dict:
         document = self._get_metadata_document()
         instance_id = document.get('instanceId')
         region = document.get('region')
-        client = boto3.client('ec2', region_name=region)
-        tags = client.describe_tags(Filters=[{'Name': 'resource-id', 'Values': [instance_id]}])
-        tags = self._parser.parse(tags)
-        sha1 = hashlib.sha1()
+        return clients.client('ec2', region).describe_tags(Filters=[{'Name': 'resource-id', 'Values': [instance_id]}])
 
-        self._logger.debug('Source/Tags: Fetched %d tags from the ec2 tags api', len(tags),
-                           extra={'status': self.status()})
-
-        for tag in sorted(tags):
-            sha1.update(json.dumps(tag).encode('utf-8'))
-        signature = base64.b64encode(sha1.digest())
-
-        if self._signature == signature:
-            self._status = SourceStatus.NO_UPDATE
-            self._send_event(SourceEvents.NO_UPDATE, source=self)
-            return
+    def _get(self) -> None:
+        tags = self._get_metadata_tags() if self._use_metadata else None
+        if tags is None:
+            tags = self._get_api_tags()
+        tags = self._parser.parse(tags)
 
-        self._status = SourceStatus.OK
-        self._signature = signature
-        self._send_event(SourceEvents.UPDATE, source=self, data=tags)
-        self.properties = tags
+        self._logger.debug('Source/Tags: Fetched %d tags', len(tags), extra={'status': self.status()})
+        self._update(tags)
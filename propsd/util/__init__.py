@@ -1,6 +1,5 @@
 import functools
 import time
-from typing import Match
 
 
 def called(func):
@@ -27,17 +26,3 @@ def debounce(seconds: int):
             return None
         return wrapped
     return wrapper
-
-
-def convert_to_object_access(match: Match) -> str:
-    filters = match.group(1).split('|')
-    if len(filters) > 1:
-        segments = filters.pop(0).split(':')
-    else:
-        filters = None
-        segments = match.group(1).split(':')
-    head = [segments.pop(0)] + ["['{}']".format(s) for s in segments]
-    if filters:
-        return '{{{{ {0}|{1} }}}}'.format(''.join(head), '|'.join(filters))
-    else:
-        return '{{{{ {0} }}}}'.format(''.join(head))
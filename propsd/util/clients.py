@@ -0,0 +1,69 @@
+import logging
+import threading
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import boto3
+from botocore.client import Config
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+# botocore's own default, used until more sources than this share a client
+_default_pool_size = 10
+
+ClientKey = NamedTuple('ClientKey', [
+    ('service', str),
+    ('region', Optional[str]),
+    ('endpoint_url', Optional[str]),
+    ('addressing_style', Optional[str])
+])
+
+
+class _Pool:
+    """
+    Process-wide AWS clients shared by every source, keyed by service, region and endpoint. Clients are
+    created from one session under a lock because creating clients from a session isn't thread safe.
+    """
+    session: Optional[boto3.session.Session] = None
+    # Clients are stored with their connection pool size so lookups outside the lock always see both
+    clients: Dict[ClientKey, Tuple[Any, int]] = {}
+    pool_size = _default_pool_size
+    lock = threading.Lock()
+
+
+def _create(key: ClientKey, pool_size: int) -> Any:
+    if _Pool.session is None:
+        _Pool.session = boto3.session.Session()
+    config = Config(max_pool_connections=pool_size,
+                    s3={'addressing_style': key.addressing_style} if key.addressing_style else None)
+    _logger.debug('Clients: Creating %s client for %s with %d connections', key.service, key.region, pool_size)
+    return _Pool.session.client(key.service, region_name=key.region, endpoint_url=key.endpoint_url,
+                                use_ssl=not key.endpoint_url or key.endpoint_url.startswith('https'),
+                                config=config)
+
+
+def client(service: str, region: Optional[str] = None, endpoint_url: Optional[str] = None,
+           addressing_style: Optional[str] = None) -> Any:
+    """
+    Return the shared client for `service` in `region`, creating it on first use. Clients are cheap to look up
+    so callers should ask for them when they're needed rather than holding on to them, which lets the pool
+    replace a client whose connection pool has become too small.
+    """
+    key = ClientKey(service, region, endpoint_url, addressing_style)
+    entry = _Pool.clients.get(key)
+    if entry is not None and entry[1] >= _Pool.pool_size:
+        return entry[0]
+    with _Pool.lock:
+        pool_size = _Pool.pool_size
+        entry = _Pool.clients.get(key)
+        if entry is None or entry[1] < pool_size:
+            entry = _Pool.clients[key] = (_create(key, pool_size), pool_size)
+        return entry[0]
+
+
+def reserve(connections: int) -> None:
+    """
+    Size connection pools for `connections` concurrent callers. Pools only ever grow, and clients with a smaller
+    pool are replaced the next time they're asked for.
+    """
+    with _Pool.lock:
+        _Pool.pool_size = max(_Pool.pool_size, connections)
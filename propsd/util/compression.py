@@ -0,0 +1,42 @@
+import gzip
+from typing import Dict, Iterable, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth the extra headers and CPU
+_minimum_size = 1024
+_gzip_level = 6
+_brotli_quality = 6
+
+
+def available_encodings():
+    """
+    Content codings we can produce, in order of preference.
+    """
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compressible(data: bytes) -> bool:
+    """
+    Whether `data` is large enough to be worth compressing.
+    """
+    return len(data) >= _minimum_size
+
+
+def compress(data: bytes, codings: Optional[Iterable[str]] = None) -> Dict[str, bytes]:
+    """
+    Compress `data` with each of `codings`, or every available content coding, keeping only the variants that
+    are smaller.
+    """
+    if not compressible(data):
+        return {}
+    variants = {}
+    for coding in codings if codings is not None else available_encodings():
+        if coding == 'gzip':
+            variants[coding] = gzip.compress(data, _gzip_level)
+        elif coding == 'br' and brotli is not None:
+            variants[coding] = brotli.compress(data, quality=_brotli_quality)
+    return {coding: variant for coding, variant in variants.items() if len(variant) < len(data)}
@@ -0,0 +1,375 @@
+"""
+Interpolation of `{{ a:b:c|filter }}` references in property values.
+
+Templates are parsed once into a compiled form, cached by their text, and resolved directly against the
+property tree. References are `:` separated paths into the tree and may be followed by Jinja filters. A
+reference that can't be resolved is preserved verbatim so it can be resolved by a later pass.
+
+`render` resolves a tree in a single pass. `Interpolator` keeps a resolved tree up to date across changes,
+tracking which paths every templated value reads so only the values affected by a change are re-rendered.
+"""
+import ast
+import functools
+import logging
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_reference_pattern = re.compile(r'{{ ?(.+?) ?}}')
+_filter_pattern = re.compile(r'^\s*([A-Za-z_][A-Za-z0-9_]*)\s*(?:\((.*)\))?\s*$', re.DOTALL)
+_default_filters = ['default', 'd']
+
+# Sentinel for references that don't resolve against the tree
+_undefined = object()
+
+Path = Tuple[Any, ...]
+
+
+class InterpolationError(Exception):
+    pass
+
+
+@functools.lru_cache(maxsize=1)
+def _environment():
+    # Jinja is only needed once a template actually uses a filter
+    from jinja2 import Environment  # pylint: disable=import-outside-toplevel
+    return Environment()
+
+
+def _parse_filter(spec: str) -> Tuple[str, tuple, dict]:
+    match = _filter_pattern.match(spec)
+    if not match:
+        raise InterpolationError('Invalid filter `{}`'.format(spec))
+    name, arguments = match.groups()
+    if not arguments:
+        return name, (), {}
+    try:
+        call = ast.parse('_({})'.format(arguments), mode='eval').body
+        # Arguments like `1), (2` close the call early and parse as something else
+        if not isinstance(call, ast.Call):
+            raise ValueError('`{}` is not an argument list'.format(arguments))
+        args = tuple(ast.literal_eval(a) for a in call.args)
+        kwargs = {k.arg: ast.literal_eval(k.value) for k in call.keywords}
+    except (SyntaxError, ValueError) as ex:
+        raise InterpolationError('Invalid arguments for filter `{}`: {}'.format(name, ex))
+    return name, args, kwargs
+
+
+class Reference:
+    __slots__ = 'text', 'path', 'filters'
+
+    def __init__(self, text: str, expression: str) -> None:
+        segments, *filters = expression.split('|')
+        self.text = text
+        self.path: Tuple[str, ...] = tuple(s.strip() for s in segments.split(':'))
+        self.filters = [_parse_filter(f) for f in filters]
+
+    def __repr__(self):
+        return '<{}: {}>'.format(self.__class__.__name__, self.text)
+
+    def resolve(self, context: Any) -> Any:
+        node = context
+        for key in self.path:
+            if not isinstance(node, dict) or key not in node:
+                node = _undefined
+                break
+            node = node[key]
+        if node is _undefined and not any(f[0] in _default_filters for f in self.filters):
+            return _undefined
+        return self._apply_filters(node)
+
+    def _apply_filters(self, value: Any) -> Any:
+        if not self.filters:
+            return value
+        env = _environment()
+        if value is _undefined:
+            value = env.undefined(name=':'.join(self.path))
+        try:
+            for name, args, kwargs in self.filters:
+                value = env.call_filter(name, value, args, kwargs)
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.debug('Interpolation: Unable to apply filters to %s: %s', self.text, ex)
+            return _undefined
+        return _undefined if isinstance(value, env.undefined) else value
+
+
+class Template:
+    """
+    A compiled template made up of literal strings and references.
+    """
+    __slots__ = 'source', 'parts', 'references'
+
+    def __init__(self, source: str, parts: List[Union[str, Reference]]) -> None:
+        self.source = source
+        self.parts = parts
+        self.references = [p for p in parts if isinstance(p, Reference)]
+
+    def __repr__(self):
+        return '<{}: {}>'.format(self.__class__.__name__, self.source)
+
+    def render(self, context: Any) -> str:
+        rendered = []
+        for part in self.parts:
+            if isinstance(part, Reference):
+                value = part.resolve(context)
+                rendered.append(part.text if value is _undefined else str(value))
+            else:
+                rendered.append(part)
+        return ''.join(rendered)
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_template(source: str) -> Optional[Template]:
+    """
+    Compile `source` into a `Template`, or return `None` if it doesn't contain any references.
+    """
+    parts: List[Union[str, Reference]] = []
+    position = 0
+    for match in _reference_pattern.finditer(source):
+        try:
+            reference = Reference(match.group(0), match.group(1).strip())
+        except InterpolationError as ex:
+            # Leave anything we can't parse as literal text
+            logger.debug('Interpolation: Ignoring %s: %s', match.group(0), ex)
+            continue
+        if match.start() > position:
+            parts.append(source[position:match.start()])
+        parts.append(reference)
+        position = match.end()
+    if not parts:
+        return None
+    if position < len(source):
+        parts.append(source[position:])
+    return Template(source, parts)
+
+
+def is_template(value: Any) -> bool:
+    return isinstance(value, str) and '{{' in value and compile_template(value) is not None
+
+
+def render(obj: Any, context: Dict[str, Any]) -> Any:
+    """
+    Resolve every templated string in `obj` against `context`. Containers without templates are returned
+    as-is so the result shares every untouched subtree with `obj`.
+    """
+    if isinstance(obj, str):
+        if '{{' not in obj:
+            return obj
+        template = compile_template(obj)
+        if template is None:
+            return obj
+        rendered_str = template.render(context)
+        return obj if rendered_str == obj else rendered_str
+    if isinstance(obj, dict):
+        rendered_dict = None
+        for key, value in obj.items():
+            rendered = render(value, context)
+            if rendered is not value:
+                if rendered_dict is None:
+                    rendered_dict = dict(obj)
+                rendered_dict[key] = rendered
+        return obj if rendered_dict is None else rendered_dict
+    if isinstance(obj, list):
+        rendered_list = [render(value, context) for value in obj]
+        if all(r is v for r, v in zip(rendered_list, obj)):
+            return obj
+        return rendered_list
+    return obj
+
+
+def _get(tree: Any, path: Path) -> Any:
+    node = tree
+    for key in path:
+        try:
+            node = node[key]
+        except (KeyError, IndexError, TypeError):
+            return _undefined
+    return node
+
+
+def _assoc(tree: Any, path: Path, value: Any, owned: Set[int]) -> Any:
+    """
+    Set `value` at `path` without modifying any container that isn't in `owned`, returning the new root.
+    Containers copied along the way are added to `owned` so each is only copied once per update.
+    """
+    if not path:
+        return {} if value is _undefined else value
+    root = tree
+    if id(root) not in owned:
+        root = list(root) if isinstance(root, list) else dict(root)
+        owned.add(id(root))
+    node = root
+    for key in path[:-1]:
+        child = _get(node, (key,))
+        if child is _undefined:
+            if value is _undefined:
+                return root
+            child = node[key] = {}
+        if id(child) not in owned:
+            child = list(child) if isinstance(child, list) else dict(child)
+            owned.add(id(child))
+            node[key] = child
+        node = child
+    if value is _undefined:
+        node.pop(path[-1], None)
+    else:
+        node[path[-1]] = value
+    return root
+
+
+def _scan(obj: Any, prefix: Path) -> Iterator[Tuple[Path, Template]]:
+    if isinstance(obj, str):
+        if '{{' in obj:
+            template = compile_template(obj)
+            if template is not None:
+                yield prefix, template
+    elif isinstance(obj, dict):
+        for key, value in obj.items():
+            yield from _scan(value, prefix + (key,))
+    elif isinstance(obj, list):
+        for index, value in enumerate(obj):
+            yield from _scan(value, prefix + (index,))
+
+
+class Interpolator:
+    """
+    Maintain the interpolated view of a property tree as it changes.
+
+    Every templated value records the paths it references. When the tree is updated with the paths that
+    changed, only templates under those paths or referencing them (directly or through other templates) are
+    re-rendered, in dependency order, so chained references resolve fully. Templates that depend on each
+    other in a cycle are left unresolved. The resolved tree shares every untouched subtree with the previous
+    result and with the source tree, neither of which is ever modified.
+    """
+
+    def __init__(self) -> None:
+        self._tree: dict = {}
+        self._resolved: dict = {}
+        self._templates: Dict[Path, Template] = {}
+        # Template paths keyed by every prefix of the paths they reference, and by the exact paths referenced
+        self._referenced_under: Dict[Path, Set[Path]] = {}
+        self._referenced_at: Dict[Path, Set[Path]] = {}
+
+    @property
+    def resolved(self) -> dict:
+        return self._resolved
+
+    def update(self, tree: dict, changed: Optional[Iterable[Path]] = None) -> dict:
+        """
+        Resolve `tree`, which differs from the previously resolved tree only at the `changed` paths. If
+        `changed` isn't given the whole tree is resolved from scratch.
+        """
+        owned: Set[int] = set()
+        resolved = self._resolved
+        dirty: Set[Path] = set()
+        for path in [()] if changed is None else changed:
+            for template_path, _ in _scan(_get(self._tree, path), path):
+                self._forget(template_path)
+            value = _get(tree, path)
+            for template_path, template in _scan(value, path):
+                self._remember(template_path, template)
+                dirty.add(template_path)
+            dirty |= self._dependents(path)
+            resolved = _assoc(resolved, path, value, owned)
+        # Templates found through an earlier path may have been removed by a later one
+        dirty.intersection_update(self._templates)
+
+        # Anything reading a template we're about to re-render has to be re-rendered after it
+        pending = list(dirty)
+        while pending:
+            for dependent in self._dependents(pending.pop()):
+                if dependent not in dirty:
+                    dirty.add(dependent)
+                    pending.append(dependent)
+
+        ordered, cyclic = self._order(dirty)
+        if cyclic:
+            logger.warning('Interpolation: Unable to resolve circular references in %s',
+                           ', '.join(':'.join(str(k) for k in p) for p in cyclic))
+            for template_path in cyclic:
+                resolved = _assoc(resolved, template_path, self._templates[template_path].source, owned)
+        for template_path in ordered:
+            resolved = _assoc(resolved, template_path, self._templates[template_path].render(resolved), owned)
+
+        self._tree = tree
+        self._resolved = resolved
+        return resolved
+
+    def _order(self, dirty: Set[Path]) -> Tuple[List[Path], List[Path]]:
+        """
+        Topologically sort the templates to render. Templates that are part of a cycle are returned separately
+        and anything that only depends on a cycle is ordered as if the cycle had already been rendered.
+        """
+        dependents = {t: self._dependents(t) & dirty for t in dirty}
+        ordered = self._sort(dependents)
+        if len(ordered) == len(dirty):
+            return ordered, []
+
+        remaining = dirty.difference(ordered)
+        cyclic = [t for t in remaining if self._reaches(dependents, t, t)]
+        rest = {t: dependents[t] - set(cyclic) for t in remaining.difference(cyclic)}
+        return ordered + self._sort(rest), cyclic
+
+    @staticmethod
+    def _sort(dependents: Dict[Path, Set[Path]]) -> List[Path]:
+        indegree = dict.fromkeys(dependents, 0)
+        for targets in dependents.values():
+            for target in targets:
+                if target in indegree:
+                    indegree[target] += 1
+        ready = [t for t, degree in indegree.items() if degree == 0]
+        ordered = []
+        while ready:
+            template_path = ready.pop()
+            ordered.append(template_path)
+            for target in dependents[template_path]:
+                if target in indegree:
+                    indegree[target] -= 1
+                    if indegree[target] == 0:
+                        ready.append(target)
+        return ordered
+
+    @staticmethod
+    def _reaches(dependents: Dict[Path, Set[Path]], start: Path, target: Path) -> bool:
+        seen: Set[Path] = set()
+        pending = list(dependents.get(start, ()))
+        while pending:
+            current = pending.pop()
+            if current == target:
+                return True
+            if current not in seen:
+                seen.add(current)
+                pending.extend(dependents.get(current, ()))
+        return False
+
+    def _dependents(self, path: Path) -> Set[Path]:
+        # Templates referencing `path`, something inside it, or one of its parents
+        found = set(self._referenced_under.get(path, ()))
+        for i in range(len(path)):
+            found |= self._referenced_at.get(path[:i], set())
+        return found
+
+    def _remember(self, path: Path, template: Template) -> None:
+        self._templates[path] = template
+        for reference in template.references:
+            self._referenced_at.setdefault(reference.path, set()).add(path)
+            for i in range(len(reference.path) + 1):
+                self._referenced_under.setdefault(reference.path[:i], set()).add(path)
+
+    def _forget(self, path: Path) -> None:
+        template = self._templates.pop(path, None)
+        if template is None:
+            return
+        for reference in template.references:
+            self._discard(self._referenced_at, reference.path, path)
+            for i in range(len(reference.path) + 1):
+                self._discard(self._referenced_under, reference.path[:i], path)
+
+    @staticmethod
+    def _discard(index: Dict[Path, Set[Path]], key: Path, path: Path) -> None:
+        paths = index.get(key)
+        if paths is not None:
+            paths.discard(path)
+            if not paths:
+                del index[key]
@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from typing import Any, Iterator, List, Optional, Set, Tuple
+
+Path = Tuple[Any, ...]
+
+_missing = object()
+
+
+def get_path(tree: Any, path: Path, default: Any = None) -> Any:
+    node = tree
+    for key in path:
+        if not isinstance(node, dict) or key not in node:
+            return default
+        node = node[key]
+    return node
+
+
+def merge(values: List[Any]) -> Any:
+    """
+    Merge `values` with the same rules as `propsd.util.remerge.remerge`: later values take precedence,
+    dicts are merged recursively and lists are purely additive.
+    """
+    result = _missing
+    for value in values:
+        if isinstance(value, dict) and isinstance(result, dict):
+            merged = dict(result)
+            for key, item in value.items():
+                merged[key] = merge([merged[key], item]) if key in merged else item
+            result = merged
+        elif isinstance(value, list) and isinstance(result, list):
+            result = result + value
+        else:
+            result = value
+    return result
+
+
+def diff_paths(old: Any, new: Any, prefix: Path = ()) -> Iterator[Path]:
+    """
+    Yield the shallowest paths at which `old` and `new` differ. Subtrees that are the same object are skipped
+    without being walked and lists are compared as a whole.
+    """
+    if old is new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old.keys() | new.keys():
+            old_value = old.get(key, _missing)
+            new_value = new.get(key, _missing)
+            if old_value is new_value:
+                continue
+            if isinstance(old_value, dict) and isinstance(new_value, dict):
+                yield from diff_paths(old_value, new_value, prefix + (key,))
+            elif type(old_value) is not type(new_value) or old_value != new_value:
+                yield prefix + (key,)
+    elif type(old) is not type(new) or old != new:
+        yield prefix
+
+
+class LayeredMerge:
+    """
+    Merge an ordered stack of property layers and keep the result up to date as individual layers change.
+
+    Updating a layer only recomputes the paths whose values differ from the previous version of that layer.
+    The merged tree is never modified in place: each update copies the containers along the changed paths
+    and shares everything else with the previous result, so earlier results stay valid. Layers must not be
+    mutated once they have been set.
+    """
+
+    def __init__(self) -> None:
+        self._layers: OrderedDict = OrderedDict()
+        self._pinned: Set[str] = set()
+        self._merged: dict = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._layers
+
+    @property
+    def merged(self) -> dict:
+        return self._merged
+
+    def set_layer(self, name: str, tree: Optional[dict], pinned: bool = False) -> List[Path]:
+        """
+        Replace the layer called `name` and return the merged paths that were recomputed. New layers are
+        stacked on top of existing ones, below any `pinned` layers. A `tree` of `None` keeps the layer's
+        position in the stack without contributing any properties.
+        """
+        old = self._layers.get(name)
+        if name not in self._layers:
+            self._layers[name] = None
+            if pinned:
+                self._pinned.add(name)
+            else:
+                for pinned_name in self._pinned:
+                    self._layers.move_to_end(pinned_name)
+        self._layers[name] = tree
+        return self._update(diff_paths(old or {}, tree or {}))
+
+    def remove_layer(self, name: str) -> List[Path]:
+        if name not in self._layers:
+            return []
+        old = self._layers.pop(name)
+        self._pinned.discard(name)
+        return self._update(diff_paths(old or {}, {}))
+
+    def _update(self, paths: Iterator[Path]) -> List[Path]:
+        owned: Set[int] = set()
+        changed: List[Path] = []
+        for path in paths:
+            path = self._anchor(path)
+            # Escalating to a shadowed ancestor can cover paths that were already recomputed
+            if any(path[:len(p)] == p for p in changed):
+                continue
+            values = [v for v in (get_path(t, path, _missing) for t in self._layers.values() if t) if v is not _missing]
+            if values:
+                self._assoc(path, merge(values), owned)
+            else:
+                path = self._orphaned(path)
+                self._assoc(path, _missing, owned)
+            changed = [p for p in changed if p[:len(path)] != path]
+            changed.append(path)
+        return changed
+
+    def _anchor(self, path: Path) -> Path:
+        # A layer holding a scalar or list at an ancestor of `path` decides the whole subtree, so recompute there
+        for i in range(1, len(path)):
+            prefix = path[:i]
+            for tree in self._layers.values():
+                node = get_path(tree, prefix, _missing) if tree else _missing
+                if node is not _missing and not isinstance(node, dict):
+                    return prefix
+        return path
+
+    def _orphaned(self, path: Path) -> Path:
+        # Find the shallowest ancestor that no layer provides any more so empty parents get pruned as well
+        for i in range(1, len(path)):
+            prefix = path[:i]
+            if not any(get_path(t, prefix, _missing) is not _missing for t in self._layers.values() if t):
+                return prefix
+        return path
+
+    def _assoc(self, path: Path, value: Any, owned: Set[int]) -> None:
+        # Copy each container along `path` once per update and write into the copies
+        if id(self._merged) not in owned:
+            self._merged = dict(self._merged)
+            owned.add(id(self._merged))
+        node = self._merged
+        for key in path[:-1]:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                child = {}
+            elif id(child) not in owned:
+                child = dict(child)
+            owned.add(id(child))
+            node[key] = child
+            node = child
+        if value is _missing:
+            node.pop(path[-1], None)
+        else:
+            node[path[-1]] = value
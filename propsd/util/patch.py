@@ -0,0 +1,37 @@
+from typing import Any, Iterable, List
+
+_missing = object()
+
+
+def to_pointer(path: Iterable[Any]) -> str:
+    """
+    Build an RFC 6901 JSON pointer from a sequence of keys.
+    """
+    return ''.join('/' + str(key).replace('~', '~0').replace('/', '~1') for key in path)
+
+
+def diff(old: Any, new: Any) -> List[dict]:
+    """
+    Return the RFC 6902 JSON patch operations turning `old` into `new`. Dicts are compared key by key,
+    skipping subtrees that are the same object, and anything else is replaced as a whole.
+    """
+    operations: List[dict] = []
+    _diff(old, new, (), operations)
+    return operations
+
+
+def _diff(old: Any, new: Any, path: tuple, operations: List[dict]) -> None:
+    if old is new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, old_value in old.items():
+            new_value = new.get(key, _missing)
+            if new_value is _missing:
+                operations.append({'op': 'remove', 'path': to_pointer(path + (key,))})
+            else:
+                _diff(old_value, new_value, path + (key,), operations)
+        for key, new_value in new.items():
+            if key not in old:
+                operations.append({'op': 'add', 'path': to_pointer(path + (key,)), 'value': new_value})
+    elif type(old) is not type(new) or old != new:
+        operations.append({'op': 'replace', 'path': to_pointer(path), 'value': new})
@@ -0,0 +1,48 @@
+import json
+from typing import Any, List
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+from propsd.enums import EnumEncoder, enum_name
+
+# pylint: disable=invalid-name
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+CBOR = 'application/cbor'
+# pylint: enable=invalid-name
+
+# Media types clients commonly use for the same formats
+aliases = {
+    'application/x-msgpack': MSGPACK,
+    'application/vnd.msgpack': MSGPACK
+}
+
+
+def available_formats() -> List[str]:
+    """
+    Media types we can serialize properties to, in order of preference.
+    """
+    formats = [JSON]
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    if cbor2 is not None:
+        formats.append(CBOR)
+    return formats
+
+
+def serialize(obj: Any, mimetype: str = JSON) -> bytes:
+    if mimetype == JSON:
+        return json.dumps(obj, cls=EnumEncoder, sort_keys=True).encode('utf-8')
+    if mimetype == MSGPACK and msgpack is not None:
+        return msgpack.packb(obj, default=enum_name, use_bin_type=True)
+    if mimetype == CBOR and cbor2 is not None:
+        return cbor2.dumps(obj, default=lambda encoder, value: encoder.encode(enum_name(value)))
+    raise ValueError('Unable to serialize to {}'.format(mimetype))
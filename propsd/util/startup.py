@@ -0,0 +1,28 @@
+import logging
+import time
+from typing import Optional
+
+# Taken when this module is first imported, which `propsd` does before anything else
+_started = time.monotonic()
+_first_ready: Optional[float] = None
+_logger = logging.getLogger(__name__)
+
+
+def time_to_ready() -> Optional[float]:
+    """
+    Seconds between process start and the first successful properties response, or `None` before there's been one.
+    """
+    return _first_ready
+
+
+def mark_ready(budget: Optional[int] = None) -> None:
+    """
+    Record the first successful properties response, warning when it took longer than `budget` seconds.
+    """
+    global _first_ready  # pylint: disable=global-statement
+    if _first_ready is not None:
+        return
+    _first_ready = time.monotonic() - _started
+    _logger.info('Propsd: Served first properties response %.3fs after starting', _first_ready)
+    if budget is not None and _first_ready > budget:
+        _logger.warning('Propsd: Startup took %.3fs, over the %ds budget', _first_ready, budget)
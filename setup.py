@@ -24,13 +24,24 @@ setup(
         'toml==0.10.0',
     ],
     extras_require={
+        'compression': [
+            'brotli==1.0.7'
+        ],
+        'binary': [
+            'msgpack==0.6.0',
+            'cbor2==4.1.2'
+        ],
+        'streaming': [
+            'ijson==3.1.4'
+        ],
         'dev': [
             'pylint==2.2.2',
             'flake8==3.6.0',
             'localstack==0.8.9',
             'amazon-kclpy==1.5.0',
             'watchdog==0.9.0',
-            'mypy==0.650'
+            'mypy==0.650',
+            'pytest==4.0.2'
         ]
     },
     entry_points="""
@@ -0,0 +1,13 @@
+import pytest
+
+from propsd.config import load_default_settings, settings
+
+
+@pytest.fixture(autouse=True)
+def default_settings():
+    """
+    Settings as the CLI leaves them. It sets `debug` after loading the defaults, and signals read it whenever a
+    receiver connects, which `SourceManager` does as it's constructed.
+    """
+    load_default_settings()
+    settings.set('debug', False)
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+
+from propsd import app
+from propsd.sourcemanager import SourceManager
+from propsd.sources.source import Source
+
+
+class _Index(Source):
+    type = 'index'
+
+    def _get(self):
+        self._update({})
+
+
+def _run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+@pytest.fixture
+def client():
+    SourceManager({})
+    index = _Index('index')
+    SourceManager.register(index, '', index=True)
+    _run(SourceManager._poll(index))  # pylint: disable=protected-access
+    return app.test_client()
+
+
+@pytest.fixture
+def waits(monkeypatch):
+    """
+    Timeouts the properties API waits for a newer snapshot with, recorded instead of waited for.
+    """
+    recorded = []
+
+    async def watch(version, timeout):  # pylint: disable=unused-argument
+        recorded.append(timeout)
+        return SourceManager.snapshot()
+
+    monkeypatch.setattr(SourceManager, 'watch', watch)
+    return recorded
+
+
+def _blocking_query(client, wait):  # pylint: disable=redefined-outer-name
+    version = SourceManager.snapshot().version
+    return _run(client.get('/v1/properties?index={}&wait={}'.format(version, wait)))
+
+
+@pytest.mark.parametrize('wait, seconds', [
+    ('500ms', 0.5),
+    ('0s', 0.0),
+    ('1m30s', 90.0),
+    # Capped at the maximum wait
+    ('20m', 600.0)
+])
+def test_wait_is_parsed_as_a_go_duration(client, waits, wait, seconds):  # pylint: disable=redefined-outer-name
+    response = _blocking_query(client, wait)
+
+    assert response.status_code == 200
+    assert waits == [seconds]
+
+
+@pytest.mark.parametrize('wait', ['abc', '10', '5x'])
+def test_invalid_wait_is_a_bad_request(client, waits, wait):  # pylint: disable=redefined-outer-name
+    response = _blocking_query(client, wait)
+
+    assert response.status_code == 400
+    assert waits == []
+
+
+def test_sub_second_wait_returns_once_it_expires(client):  # pylint: disable=redefined-outer-name
+    start = time.monotonic()
+    response = _blocking_query(client, '500ms')
+    elapsed = time.monotonic() - start
+
+    assert response.status_code == 200
+    assert 0.5 <= elapsed < 2
@@ -0,0 +1,53 @@
+from propsd.enums import SourceStatus
+from propsd.sources.consul import ConsulSource
+
+
+class _Cluster:
+    """
+    Stands in for the catalog and health endpoints of a Consul cluster. Every change moves its index on.
+    """
+
+    def __init__(self, registered: dict) -> None:
+        self.index = 1
+        self.registered = registered
+
+    def deregister(self, service: str) -> None:
+        del self.registered[service]
+        self.index += 1
+
+    def state(self, name, index=None, wait=None, node_meta=None):  # pylint: disable=unused-argument
+        return str(self.index), [{'ServiceName': s, 'ModifyIndex': self.index} for s in self.registered]
+
+    def services(self, consistency=None, node_meta=None):  # pylint: disable=unused-argument
+        return str(self.index), dict(self.registered)
+
+    def service(self, service, passing=False, tag=None, node_meta=None):  # pylint: disable=unused-argument
+        return str(self.index), [{'Node': {'Address': '10.0.0.1'}, 'Service': {'Address': ''}}]
+
+
+def _source(cluster: _Cluster) -> ConsulSource:
+    source = ConsulSource('consul')
+    # pylint: disable=protected-access
+    source._health = cluster
+    source._catalog = cluster
+    return source
+
+
+def test_deregistering_the_last_service_removes_it():
+    cluster = _Cluster({'redis': ['primary']})
+    source = _source(cluster)
+
+    source._get()  # pylint: disable=protected-access
+    assert source.properties.to_dict() == {'consul': {'redis': {'cluster': 'redis', 'addresses': ['10.0.0.1']}}}
+
+    cluster.deregister('redis')
+    source._get()  # pylint: disable=protected-access
+    assert source.properties.to_dict() == {'consul': {}}
+
+
+def test_unchanged_services_are_not_published_again():
+    source = _source(_Cluster({'redis': ['primary']}))
+
+    source._get()  # pylint: disable=protected-access
+    source._get()  # pylint: disable=protected-access
+    assert source._status == SourceStatus.NO_UPDATE  # pylint: disable=protected-access
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+import pytest
+import requests
+
+from propsd import app
+from propsd.sourcemanager import SourceManager
+from propsd.sources.source import Source
+
+# Seconds the stand-in takes to answer, which is far longer than an API request should ever take
+_delay = 0.25
+_sources = 100
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name
+        time.sleep(_delay)
+        body = json.dumps({'path': self.path}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class _SlowSource(Source):
+    type = 'slow'
+
+    def __init__(self, name: str, url: str) -> None:
+        super().__init__(name)
+        self._url = url
+
+    def _get(self):
+        self._update(requests.get(self._url, timeout=5).json())
+
+
+@pytest.fixture
+def slow_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SlowHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+async def _measure(client, requests_made: int = 0, until: Optional[asyncio.Future] = None) -> List[float]:
+    latencies = []
+    while (until is not None and not until.done()) or len(latencies) < requests_made:
+        start = time.monotonic()
+        await client.get('/v1/health')
+        latencies.append(time.monotonic() - start)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+def test_api_latency_is_flat_while_sources_poll(slow_server):
+    SourceManager({})
+    sources = [_SlowSource('slow-{}'.format(i), '{}/{}'.format(slow_server, i)) for i in range(_sources)]
+    for source in sources:
+        SourceManager.register(source, 'slow:{}'.format(source.name))
+    client = app.test_client()
+
+    async def run():
+        baseline = await _measure(client, requests_made=20)
+        # pylint: disable=protected-access
+        polls = asyncio.ensure_future(asyncio.gather(*(SourceManager._poll(s) for s in sources)))
+        loaded = await _measure(client, until=polls)
+        await polls
+        return baseline, loaded
+
+    started = time.monotonic()
+    baseline, loaded = asyncio.get_event_loop().run_until_complete(run())
+
+    # The polls were actually slow and overlapped with the requests
+    assert time.monotonic() - started >= _delay
+    assert len(loaded) > 1
+    assert all(s.properties.get('path') for s in sources)
+    # No request waited behind a fetch, which would take at least as long as the stand-in does to answer
+    assert max(loaded) < max(baseline) + _delay / 2
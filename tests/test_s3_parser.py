@@ -0,0 +1,21 @@
+import io
+
+from propsd.sources.s3 import parser
+from propsd.sources.s3.parser import S3Parser
+
+
+def test_documents_are_streamed_through_the_c_backend():
+    assert parser.ijson is not None
+    assert parser.ijson.__name__ == 'ijson.backends.yajl2_c'
+
+
+def test_only_document_fields_are_kept():
+    body = io.BytesIO(b'{"version": 1, "ignored": {"a": [1, 2]}, "properties": {"a": 1.5}, "sources": []}')
+
+    assert S3Parser().parse(body) == (1, {'a': 1.5}, [])
+
+
+def test_top_level_keys_containing_dots_are_not_mistaken_for_fields():
+    body = io.BytesIO(b'{"properties": {"z": 2}, "properties.old": {"z": 1}, "version": 3}')
+
+    assert S3Parser().parse(body) == (3, {'z': 2}, [])
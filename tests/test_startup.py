@@ -0,0 +1,64 @@
+import json
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+# Runs in a fresh interpreter so the time to ready includes importing propsd, as it would in a new process
+_script = textwrap.dedent("""
+    import asyncio
+    import json
+    import sys
+
+    from propsd import app
+    from propsd.config import settings, to_seconds
+    from propsd.sourcemanager import SourceManager
+    from propsd.sources.source import Source
+    from propsd.util import startup
+
+    # Source plugins and their clients are only imported once a source of their type is created
+    eager = [module for module in ('boto3', 'kubernetes', 'consul') if module in sys.modules]
+
+
+    class Index(Source):
+        type = 'index'
+
+        def _get(self):
+            self._update({})
+
+
+    async def main():
+        # As the CLI does. Signals read it when SourceManager connects its receivers.
+        settings.set('debug', False)
+        SourceManager({})
+        index = Index('index')
+        SourceManager.register(index, '', index=True)
+        await SourceManager._poll(index)
+        response = await app.test_client().get('/v1/properties')
+        return response.status_code
+
+    status = asyncio.get_event_loop().run_until_complete(main())
+    print(json.dumps({
+        'status': status,
+        'eager': eager,
+        'startup': startup.time_to_ready(),
+        'budget': to_seconds(settings.get('service.startup_budget'))
+    }))
+""")
+
+
+@pytest.fixture(scope='module')
+def measured():
+    result = subprocess.run([sys.executable, '-c', _script], stdout=subprocess.PIPE, check=True)
+    return json.loads(result.stdout.decode('utf-8').strip().splitlines()[-1])
+
+
+def test_source_plugins_are_not_imported_at_startup(measured):
+    assert measured['eager'] == []
+
+
+def test_first_properties_response_is_within_startup_budget(measured):
+    assert measured['status'] == 200
+    assert measured['startup'] is not None
+    assert measured['startup'] < measured['budget']